@@ -3,11 +3,14 @@ from django.urls import path, include
 from django.views.generic import RedirectView
 from django.conf import settings
 from django.conf.urls.static import static
-from .views import MainPageView, DocsView, TestDropdownView, TestDjangoView
+from .views import MainPageView, DocsView, TestDropdownView, TestDjangoView, cache_page_for_anonymous
 
 # Импортируем наш расширенный административный сайт
 from utils.admin_site import admin_site
 
+# Время кэширования статических страниц для анонимных пользователей (1 час)
+STATIC_PAGE_CACHE_TIMEOUT = 60 * 60
+
 urlpatterns = [
     path('admin/', admin_site.urls),
     # URL-маршруты для управления командами
@@ -27,15 +30,17 @@ urlpatterns = [
     # Обработка favicon
     path('favicon.ico', RedirectView.as_view(url='/static/images/favicon.ico', permanent=True)),
     # Главная страница сайта
-    path('', MainPageView.as_view(), name='main_page'),
+    path('', cache_page_for_anonymous(STATIC_PAGE_CACHE_TIMEOUT)(MainPageView.as_view()), name='main_page'),
     # Страница документации
-    path('docs/', DocsView.as_view(), name='docs'),
-    # Тестовая страница для dropdown
-    path('test-dropdown/', TestDropdownView.as_view(), name='test_dropdown'),
-    # Тестовая страница для Django template
-    path('test-django/', TestDjangoView.as_view(), name='test_django'),
+    path('docs/', cache_page_for_anonymous(STATIC_PAGE_CACHE_TIMEOUT)(DocsView.as_view()), name='docs'),
 ]
 
-# Обслуживание медиафайлов в режиме разработки
+# Обслуживание медиафайлов и тестовых страниц в режиме разработки
 if settings.DEBUG:
+    urlpatterns += [
+        # Тестовая страница для dropdown
+        path('test-dropdown/', TestDropdownView.as_view(), name='test_dropdown'),
+        # Тестовая страница для Django template
+        path('test-django/', TestDjangoView.as_view(), name='test_django'),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
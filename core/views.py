@@ -1,9 +1,40 @@
 from django.views.generic import TemplateView
+from django.views.decorators.cache import cache_page
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from functools import wraps
 import random
 
 
+def cache_page_for_anonymous(timeout):
+    """
+    Кэширует отрендеренную страницу только для анонимных пользователей.
+
+    Навигация в base.html зависит от пользователя, поэтому авторизованные
+    запросы всегда рендерятся заново. Анонимный ответ помечается как
+    public с max-age=timeout, чтобы его могли отдавать браузер и CDN.
+    Шаблон читает user, поэтому ответ получает Vary: Cookie: после входа
+    cookie меняются, и сохраненная анонимная версия не используется.
+
+    Запрос без cookie сессии заведомо анонимный - сессия для него не читается.
+    """
+    def decorator(view_func):
+        cached_view = cache_page(timeout)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (settings.SESSION_COOKIE_NAME in request.COOKIES
+                    and request.user.is_authenticated):
+                return view_func(request, *args, **kwargs)
+            response = cached_view(request, *args, **kwargs)
+            patch_cache_control(response, public=True, max_age=timeout)
+            return response
+        return wrapper
+    return decorator
+
+
 class MainPageView(TemplateView):
     """Представление главной страницы сайта"""
     template_name = 'main.html'
@@ -30,7 +61,7 @@ class TestDjangoView(TemplateView):
         
         # Добавляем тестовую команду если есть
         from teams.models import Team
-        test_team = Team.objects.first()
+        test_team = Team.objects.only('id', 'name').first()
         context['test_team'] = test_team
         
         return context
\ No newline at end of file
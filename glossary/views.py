@@ -2,13 +2,31 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.db.models import Exists, OuterRef
 from projects.models import Project
+from teams.models import TeamMembership
+
+
+def get_project_for_user(request, project_id):
+    """
+    Возвращает проект, если пользователь активно состоит в его команде, иначе 404
+
+    Членство проверяется подзапросом EXISTS вместо JOIN через участников команды,
+    поэтому дубликаты строк и DISTINCT не нужны. Подзапрос использует индекс
+    unique_together (user, team) таблицы TeamMembership.
+    """
+    is_member = TeamMembership.objects.filter(
+        team_id=OuterRef('team_id'), user=request.user, is_active=True
+    )
+    return get_object_or_404(
+        Project.objects.filter(id=project_id).filter(Exists(is_member))
+    )
 
 
 @login_required
 def glossary_list(request, project_id):
     """Список терминов глоссария для проекта"""
-    project = get_object_or_404(Project, id=project_id, team__members=request.user)
+    project = get_project_for_user(request, project_id)
     
     # Пока что заглушка - в будущем здесь будут термины
     terms = []
@@ -22,7 +40,7 @@ def glossary_list(request, project_id):
 @login_required
 def glossary_create(request, project_id):
     """Создание нового термина (заглушка)"""
-    project = get_object_or_404(Project, id=project_id, team__members=request.user)
+    project = get_project_for_user(request, project_id)
     
     if request.method == 'POST':
         messages.info(request, 'Функция создания терминов пока не реализована.')
@@ -36,7 +54,7 @@ def glossary_create(request, project_id):
 @login_required
 def glossary_detail(request, project_id, pk):
     """Детали термина (заглушка)"""
-    project = get_object_or_404(Project, id=project_id, team__members=request.user)
+    project = get_project_for_user(request, project_id)
     
     return render(request, 'glossary/glossary_detail.html', {
         'project': project,
@@ -1,8 +1,13 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.utils import timezone
 
 from .models import Notification, UserNotificationPreferences, NotificationType
+from .services import NotificationService
+
+# Размер пачки для массовых UPDATE из действий админки
+ADMIN_UPDATE_CHUNK_SIZE = 5000
 
 
 @admin.register(Notification)
@@ -13,6 +18,7 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ('notification_type', 'is_read', 'created_at')
     search_fields = ('title', 'message', 'recipient__username', 'recipient__email')
     readonly_fields = ('created_at', 'read_at')
+    list_select_related = ('recipient',)
     date_hierarchy = 'created_at'
     
     fieldsets = (
@@ -28,6 +34,10 @@ class NotificationAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """extra_data не выводится в списке - откладываем загрузку JSON до формы редактирования"""
+        return super().get_queryset(request).defer('extra_data')
+    
     def notification_type_display(self, obj):
         """Отображение типа уведомления с цветовой индикацией"""
         colors = {
@@ -52,20 +62,34 @@ class NotificationAdmin(admin.ModelAdmin):
     
     def mark_as_read(self, request, queryset):
         """Массовая отметка уведомлений как прочитанных"""
+        # Сначала целиком читаем ключи выбранных строк: изменять строки, пока
+        # запрос по ним (через частичный индекс is_read=False) еще читается,
+        # небезопасно. Затем обновляем пачками, фиксируя каждую отдельно,
+        # чтобы не держать блокировку записи на все время действия
+        now = timezone.now()
+        rows = list(queryset.filter(is_read=False).order_by('pk').values_list('pk', 'recipient_id'))
+        recipient_ids = {recipient_id for _, recipient_id in rows}
         count = 0
-        for notification in queryset.filter(is_read=False):
-            notification.mark_as_read()
-            count += 1
+        for start in range(0, len(rows), ADMIN_UPDATE_CHUNK_SIZE):
+            pks = [pk for pk, _ in rows[start:start + ADMIN_UPDATE_CHUNK_SIZE]]
+            with transaction.atomic():
+                count += Notification.objects.filter(pk__in=pks, is_read=False).update(
+                    is_read=True,
+                    read_at=now
+                )
+        NotificationService.recount_unread(*recipient_ids)
         
         self.message_user(request, f'Отмечено как прочитанные {count} уведомлений')
     mark_as_read.short_description = 'Отметить как прочитанные'
     
     def mark_as_unread(self, request, queryset):
         """Массовая отметка уведомлений как непрочитанных"""
+        recipient_ids = list(queryset.order_by().values_list('recipient_id', flat=True).distinct())
         count = queryset.filter(is_read=True).update(
             is_read=False,
             read_at=None
         )
+        NotificationService.recount_unread(*recipient_ids)
         
         self.message_user(request, f'Отмечено как непрочитанные {count} уведомлений')
     mark_as_unread.short_description = 'Отметить как непрочитанные'
@@ -78,11 +102,12 @@ class UserNotificationPreferencesAdmin(admin.ModelAdmin):
     list_display = ('user', 'email_notifications_summary', 'web_notifications_summary', 'updated_at')
     list_filter = ('email_team_status_changes', 'web_team_status_changes', 'created_at')
     search_fields = ('user__username', 'user__email')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('unread_count', 'created_at', 'updated_at')
+    list_select_related = ('user',)
     
     fieldsets = (
         ('Пользователь', {
-            'fields': ('user',)
+            'fields': ('user', 'unread_count')
         }),
         ('Email уведомления', {
             'fields': (
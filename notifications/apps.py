@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class NotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notifications'
+    
+    def ready(self):
+        """Подключает сигналы счетчика уведомлений и прогревает шаблоны писем"""
+        import notifications.signals  # noqa
+        from .services import preload_email_templates
+        
+        preload_email_templates()
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-16 12:30
+
+import notifications.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_rename_notification_recipie_b8b8b8_idx_notificatio_recipie_a972ce_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='extra_data',
+            field=models.JSONField(blank=True, default=dict, encoder=notifications.models.FastJSONEncoder, verbose_name='Дополнительные данные'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-16 14:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_unread_count(apps, schema_editor):
+    """Заполняет счетчик непрочитанных уведомлений по существующим данным"""
+    Notification = apps.get_model('notifications', 'Notification')
+    UserNotificationPreferences = apps.get_model('notifications', 'UserNotificationPreferences')
+
+    unread = Notification.objects.filter(
+        recipient_id=OuterRef('user_id'), is_read=False
+    ).order_by().values('recipient_id').annotate(total=Count('id')).values('total')
+
+    UserNotificationPreferences.objects.update(unread_count=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usernotificationpreferences',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Непрочитанных уведомлений'),
+        ),
+        migrations.RunPython(populate_unread_count, migrations.RunPython.noop),
+    ]
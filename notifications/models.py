@@ -1,10 +1,47 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
 User = get_user_model()
 
 
+class FastJSONEncoder(DjangoJSONEncoder):
+    """
+    JSON-энкодер для extra_data, использующий orjson при его наличии.
+    
+    Значения, которые orjson сериализует по-своему (datetime, UUID) или
+    не сериализует вовсе (Decimal, lazy-строки, целые больше 64 бит),
+    кодируются DjangoJSONEncoder, поэтому результат совпадает с ним.
+    Без orjson работает как обычный DjangoJSONEncoder.
+    """
+    
+    def encode(self, o):
+        if orjson is None:
+            return super().encode(o)
+        try:
+            # OPT_PASSTHROUGH_* отдает datetime/dataclass/подклассы в default
+            # (DjangoJSONEncoder.default), а не в собственный формат orjson
+            return orjson.dumps(
+                o,
+                default=self.default,
+                option=(
+                    orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS
+                    | orjson.OPT_PASSTHROUGH_SUBCLASS
+                ),
+            ).decode()
+        except TypeError:
+            return super().encode(o)
+
+
 class NotificationType(models.TextChoices):
     """Типы уведомлений"""
     TEAM_DEACTIVATED = 'team_deactivated', 'Команда приостановлена'
@@ -40,6 +77,7 @@ class Notification(models.Model):
     # Дополнительные данные в JSON формате
     extra_data = models.JSONField(
         default=dict,
+        encoder=FastJSONEncoder,
         blank=True,
         verbose_name='Дополнительные данные'
     )
@@ -65,8 +103,18 @@ class Notification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['recipient', '-created_at']),
-            models.Index(fields=['recipient', 'is_read']),
             models.Index(fields=['notification_type']),
+            # Индекс для списка с фильтром по статусу прочтения
+            models.Index(
+                fields=['recipient', 'is_read', '-created_at'],
+                name='notif_recip_read_created',
+            ),
+            # Частичный индекс для подсчета и вывода непрочитанных уведомлений
+            models.Index(
+                fields=['recipient', '-created_at'],
+                condition=Q(is_read=False),
+                name='notif_recip_unread',
+            ),
         ]
         verbose_name = 'Уведомление'
         verbose_name_plural = 'Уведомления'
@@ -135,6 +183,12 @@ class UserNotificationPreferences(models.Model):
         verbose_name='Веб уведомления об упоминаниях в комментариях'
     )
     
+    # Денормализованный счетчик непрочитанных уведомлений (поддерживается NotificationService)
+    unread_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Непрочитанных уведомлений'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -2,11 +2,19 @@
 Сервисы для работы с уведомлениями
 """
 
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import select_template
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connections, router
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
+from functools import lru_cache
+import csv
+import io
+import json
 import logging
 
 from .models import Notification, NotificationType, UserNotificationPreferences
@@ -14,6 +22,77 @@ from .models import Notification, NotificationType, UserNotificationPreferences
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Размер пакета для bulk_create при массовой рассылке уведомлений
+NOTIFICATION_BATCH_SIZE = 1000
+
+# Начиная с этого числа уведомлений на PostgreSQL используется COPY вместо bulk_create
+COPY_INSERT_THRESHOLD = 10_000
+
+# Поля настроек (веб, email), управляющие доставкой каждого типа уведомлений
+NOTIFICATION_PREF_ATTRS = {
+    NotificationType.TEAM_DEACTIVATED: ('web_team_status_changes', 'email_team_status_changes'),
+    NotificationType.TEAM_REACTIVATED: ('web_team_status_changes', 'email_team_status_changes'),
+    NotificationType.TEAM_DISBANDED: ('web_team_status_changes', 'email_team_status_changes'),
+    NotificationType.TEAM_INVITATION: ('web_team_invitations', 'email_team_invitations'),
+    NotificationType.TASK_ASSIGNED: ('web_task_assignments', 'email_task_assignments'),
+    NotificationType.PROJECT_UPDATE: ('web_project_updates', 'email_project_updates'),
+    NotificationType.COMMENT_MENTION: ('web_comment_mentions', 'email_comment_mentions'),
+}
+
+# Шаблоны email-уведомлений (HTML, текстовая версия лежит рядом с расширением .txt)
+EMAIL_TEMPLATE_MAP = {
+    NotificationType.TEAM_DEACTIVATED: 'notifications/email/team_deactivated.html',
+    NotificationType.TEAM_REACTIVATED: 'notifications/email/team_reactivated.html',
+    NotificationType.TEAM_DISBANDED: 'notifications/email/team_disbanded.html',
+    NotificationType.TEAM_INVITATION: 'notifications/email/team_invitation.html',
+    NotificationType.TASK_ASSIGNED: 'notifications/email/task_assigned.html',
+    NotificationType.PROJECT_UPDATE: 'notifications/email/project_update.html',
+    NotificationType.COMMENT_MENTION: 'notifications/email/comment_mention.html',
+}
+DEFAULT_EMAIL_TEMPLATE = 'notifications/email/default.html'
+
+# Типы уведомлений по изменениям статуса команды (ключи - значения TeamStatusChangeType)
+NOTIF_TYPE_MAP = {
+    'deactivated': NotificationType.TEAM_DEACTIVATED,
+    'reactivated': NotificationType.TEAM_REACTIVATED,
+    'disbanded': NotificationType.TEAM_DISBANDED,
+}
+
+# Шаблоны заголовков и сообщений об изменении статуса команды
+TITLE_TEMPLATES = {
+    NotificationType.TEAM_DEACTIVATED: 'Команда "{team}" приостановлена',
+    NotificationType.TEAM_REACTIVATED: 'Команда "{team}" возобновлена',
+    NotificationType.TEAM_DISBANDED: 'Команда "{team}" распущена',
+}
+MESSAGE_TEMPLATES = {
+    NotificationType.TEAM_DEACTIVATED: 'Руководитель {user} приостановил работу команды "{team}". Функции управления ограничены до возобновления работы.',
+    NotificationType.TEAM_REACTIVATED: 'Руководитель {user} возобновил работу команды "{team}". Все функции снова доступны.',
+    NotificationType.TEAM_DISBANDED: 'Руководитель {user} распустил команду "{team}". Все участники исключены из команды.',
+}
+
+
+@lru_cache(maxsize=32)
+def _get_email_templates(notification_type):
+    """
+    Возвращает пару скомпилированных шаблонов письма (HTML, текст) для типа уведомления
+    
+    Шаблоны ищутся один раз на тип и переиспользуются между письмами. Если для типа
+    нет собственного шаблона, используется шаблон по умолчанию.
+    """
+    template_name = EMAIL_TEMPLATE_MAP.get(notification_type, DEFAULT_EMAIL_TEMPLATE)
+    html_template = select_template([template_name, DEFAULT_EMAIL_TEMPLATE])
+    text_template = select_template([
+        template_name.replace('.html', '.txt'),
+        DEFAULT_EMAIL_TEMPLATE.replace('.html', '.txt'),
+    ])
+    return html_template, text_template
+
+
+def preload_email_templates():
+    """Загружает и компилирует шаблоны писем всех типов уведомлений при старте процесса"""
+    for notification_type in NotificationType:
+        _get_email_templates(notification_type)
+
 
 class NotificationService:
     """Сервис для отправки уведомлений"""
@@ -29,46 +108,31 @@ class NotificationService:
             changed_by: Пользователь, выполнивший изменение
             reason: Причина изменения
         """
-        from teams.models import TeamStatusChangeType
-        
-        # Определяем тип уведомления
-        notification_type_map = {
-            TeamStatusChangeType.DEACTIVATED: NotificationType.TEAM_DEACTIVATED,
-            TeamStatusChangeType.REACTIVATED: NotificationType.TEAM_REACTIVATED,
-            TeamStatusChangeType.DISBANDED: NotificationType.TEAM_DISBANDED,
-        }
-        
-        notification_type = notification_type_map.get(change_type)
+        notification_type = NOTIF_TYPE_MAP.get(change_type)
         if not notification_type:
             logger.warning(f"Неизвестный тип изменения статуса команды: {change_type}")
             return
         
-        # Получаем всех участников команды (кроме того, кто выполнил действие)
-        from teams.models import TeamMembership
-        recipients = User.objects.filter(
-            teammembership__team=team
-        ).exclude(id=changed_by.id).distinct()
+        # Получаем всех участников команды (кроме того, кто выполнил действие).
+        # Для рассылки и шаблонов писем нужны только id, email и username
+        recipients = list(
+            User.objects.filter(
+                teammembership__team=team
+            ).exclude(id=changed_by.id).distinct().only('id', 'email', 'username')
+        )
+        if not recipients:
+            return
         
         # Генерируем заголовок и сообщение
-        title_map = {
-            NotificationType.TEAM_DEACTIVATED: f'Команда "{team.name}" приостановлена',
-            NotificationType.TEAM_REACTIVATED: f'Команда "{team.name}" возобновлена',
-            NotificationType.TEAM_DISBANDED: f'Команда "{team.name}" распущена',
-        }
-        
-        message_map = {
-            NotificationType.TEAM_DEACTIVATED: f'Руководитель {changed_by.username} приостановил работу команды "{team.name}". Функции управления ограничены до возобновления работы.',
-            NotificationType.TEAM_REACTIVATED: f'Руководитель {changed_by.username} возобновил работу команды "{team.name}". Все функции снова доступны.',
-            NotificationType.TEAM_DISBANDED: f'Руководитель {changed_by.username} распустил команду "{team.name}". Все участники исключены из команды.',
-        }
-        
-        title = title_map[notification_type]
-        message = message_map[notification_type]
+        title = TITLE_TEMPLATES[notification_type].format(team=team.name)
+        message = MESSAGE_TEMPLATES[notification_type].format(team=team.name, user=changed_by.username)
         
         if reason:
             message += f' Причина: {reason}'
         
-        # Дополнительные данные
+        # Дополнительные данные. Один и тот же словарь передается по ссылке во все
+        # уведомления пакета (JSONField сериализует каждую строку при вставке),
+        # поэтому после формирования пакета его нельзя изменять
         extra_data = {
             'team_id': team.id,
             'team_name': team.name,
@@ -78,143 +142,302 @@ class NotificationService:
             'reason': reason,
         }
         
-        # Отправляем уведомления всем участникам
+        # Загружаем (и при необходимости создаем) настройки всех получателей
+        preferences_map = NotificationService._bulk_get_preferences(
+            [recipient.id for recipient in recipients]
+        )
+        
+        web_notifications = []
+        email_recipients = []
         for recipient in recipients:
-            NotificationService._create_and_send_notification(
-                recipient=recipient,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                extra_data=extra_data
-            )
+            preferences = preferences_map[recipient.id]
+            
+            if NotificationService._should_send_web_notification(preferences, notification_type):
+                web_notifications.append(Notification(
+                    recipient=recipient,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                    extra_data=extra_data
+                ))
+            
+            if (NotificationService._should_send_email_notification(preferences, notification_type)
+                    and recipient.email):
+                email_recipients.append(recipient)
+        
+        # Создаем веб-уведомления пакетно вместо запроса на каждого участника
+        NotificationService._insert_notifications(web_notifications)
+        # bulk_create не вызывает post_save, поэтому счетчики обновляем явно
+        NotificationService.change_unread_count(
+            [notification.recipient_id for notification in web_notifications], 1
+        )
+        
+        NotificationService._bulk_send_email(
+            email_recipients, notification_type, title, message, extra_data
+        )
         
         logger.info(f"Отправлены уведомления об изменении статуса команды {team.name} "
-                   f"({change_type}) для {recipients.count()} участников")
+                   f"({change_type}) для {len(recipients)} участников")
     
     @staticmethod
-    def _create_and_send_notification(recipient, notification_type, title, message, extra_data=None):
+    def _insert_notifications(notifications):
         """
-        Создает уведомление и отправляет его пользователю
+        Сохраняет пакет уведомлений
+        
+        Очень большие рассылки на PostgreSQL загружаются через COPY,
+        остальные - через bulk_create пакетами по NOTIFICATION_BATCH_SIZE.
         
         Args:
-            recipient: Получатель уведомления
-            notification_type: Тип уведомления
-            title: Заголовок
-            message: Сообщение
-            extra_data: Дополнительные данные
+            notifications: Список несохраненных объектов Notification
         """
-        if extra_data is None:
-            extra_data = {}
+        connection = connections[router.db_for_write(Notification)]
+        if len(notifications) > COPY_INSERT_THRESHOLD and connection.vendor == 'postgresql':
+            NotificationService._copy_insert(notifications, connection)
+        else:
+            Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+    
+    @staticmethod
+    def _copy_insert(notifications, connection):
+        """
+        Загружает уведомления в таблицу командой COPY ... FROM STDIN (только PostgreSQL)
         
-        # Получаем настройки уведомлений пользователя
-        preferences = UserNotificationPreferences.get_or_create_for_user(recipient)
+        Объекты не получают первичные ключи и сигналы не отправляются.
+        Одинаковые словари extra_data сериализуются один раз.
+        """
+        columns = ['recipient_id', 'notification_type', 'title', 'message',
+                   'extra_data', 'is_read', 'created_at']
+        encoder = Notification._meta.get_field('extra_data').encoder
+        now = timezone.now()
+        encoded_extra = {}
         
-        # Проверяем, нужно ли отправлять веб-уведомление
-        web_notification_enabled = NotificationService._should_send_web_notification(
-            preferences, notification_type
+        buffer = io.StringIO()
+        # QUOTE_NONNUMERIC: пустые строки попадают в CSV в кавычках и не превращаются в NULL
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        for notification in notifications:
+            extra_key = id(notification.extra_data)
+            if extra_key not in encoded_extra:
+                encoded_extra[extra_key] = json.dumps(notification.extra_data, cls=encoder)
+            writer.writerow([
+                notification.recipient_id,
+                notification.notification_type,
+                notification.title,
+                notification.message,
+                encoded_extra[extra_key],
+                notification.is_read,
+                now,
+            ])
+        buffer.seek(0)
+        
+        quote_name = connection.ops.quote_name
+        sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            quote_name(Notification._meta.db_table),
+            ', '.join(quote_name(column) for column in columns)
         )
+        with connection.cursor() as cursor:
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
         
-        if web_notification_enabled:
-            # Создаем веб-уведомление
-            notification = Notification.objects.create(
-                recipient=recipient,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                extra_data=extra_data
-            )
-            logger.debug(f"Создано веб-уведомление {notification.id} для {recipient.username}")
+        logger.info(f"Загружено {len(notifications)} уведомлений через COPY")
+    
+    @staticmethod
+    def _bulk_get_preferences(user_ids):
+        """
+        Возвращает настройки уведомлений для списка пользователей
         
-        # Проверяем, нужно ли отправлять email-уведомление
-        email_notification_enabled = NotificationService._should_send_email_notification(
-            preferences, notification_type
-        )
+        Отсутствующие настройки создаются одним bulk_create со значениями
+        по умолчанию, поэтому для любого числа пользователей выполняется
+        не более трех запросов.
+        
+        Args:
+            user_ids: Список ID пользователей
+        
+        Returns:
+            dict: Словарь {user_id: UserNotificationPreferences}
+        """
+        preferences_map = UserNotificationPreferences.objects.filter(
+            user_id__in=user_ids
+        ).in_bulk(field_name='user_id')
         
-        if email_notification_enabled and recipient.email:
-            NotificationService._send_email_notification(
-                recipient, notification_type, title, message, extra_data
+        missing_ids = set(user_ids) - preferences_map.keys()
+        if missing_ids:
+            UserNotificationPreferences.objects.bulk_create(
+                [UserNotificationPreferences(user_id=user_id) for user_id in missing_ids],
+                ignore_conflicts=True
             )
+            preferences_map.update(
+                UserNotificationPreferences.objects.filter(
+                    user_id__in=missing_ids
+                ).in_bulk(field_name='user_id')
+            )
+        
+        return preferences_map
     
     @staticmethod
     def _should_send_web_notification(preferences, notification_type):
         """Проверяет, нужно ли отправлять веб-уведомление"""
-        web_settings_map = {
-            NotificationType.TEAM_DEACTIVATED: preferences.web_team_status_changes,
-            NotificationType.TEAM_REACTIVATED: preferences.web_team_status_changes,
-            NotificationType.TEAM_DISBANDED: preferences.web_team_status_changes,
-            NotificationType.TEAM_INVITATION: preferences.web_team_invitations,
-            NotificationType.TASK_ASSIGNED: preferences.web_task_assignments,
-            NotificationType.PROJECT_UPDATE: preferences.web_project_updates,
-            NotificationType.COMMENT_MENTION: preferences.web_comment_mentions,
-        }
-        return web_settings_map.get(notification_type, True)
+        web_attr, _ = NOTIFICATION_PREF_ATTRS.get(notification_type, (None, None))
+        if web_attr is None:
+            return True
+        return getattr(preferences, web_attr)
     
     @staticmethod
     def _should_send_email_notification(preferences, notification_type):
         """Проверяет, нужно ли отправлять email-уведомление"""
-        email_settings_map = {
-            NotificationType.TEAM_DEACTIVATED: preferences.email_team_status_changes,
-            NotificationType.TEAM_REACTIVATED: preferences.email_team_status_changes,
-            NotificationType.TEAM_DISBANDED: preferences.email_team_status_changes,
-            NotificationType.TEAM_INVITATION: preferences.email_team_invitations,
-            NotificationType.TASK_ASSIGNED: preferences.email_task_assignments,
-            NotificationType.PROJECT_UPDATE: preferences.email_project_updates,
-            NotificationType.COMMENT_MENTION: preferences.email_comment_mentions,
+        _, email_attr = NOTIFICATION_PREF_ATTRS.get(notification_type, (None, None))
+        if email_attr is None:
+            return True
+        return getattr(preferences, email_attr)
+    
+    @staticmethod
+    def _build_email_message(recipient, notification_type, title, message, extra_data, connection=None):
+        """Формирует email-сообщение с HTML и текстовой версией"""
+        # Шаблоны для email (без request - контекстные процессоры письмам не нужны)
+        html_template, text_template = _get_email_templates(notification_type)
+        
+        # Контекст для шаблона
+        context = {
+            'recipient': recipient,
+            'title': title,
+            'message': message,
+            'extra_data': extra_data,
+            'site_name': getattr(settings, 'SITE_NAME', 'MangaCollab'),
         }
-        return email_settings_map.get(notification_type, True)
+        
+        # Рендерим HTML и текстовую версию
+        html_message = html_template.render(context)
+        text_message = text_template.render(context)
+        
+        email = EmailMultiAlternatives(
+            subject=f"[MangaCollab] {title}",
+            body=text_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[recipient.email],
+            connection=connection
+        )
+        email.attach_alternative(html_message, 'text/html')
+        return email
     
     @staticmethod
-    def _send_email_notification(recipient, notification_type, title, message, extra_data):
-        """Отправляет email-уведомление"""
+    def _bulk_send_email(recipients, notification_type, title, message, extra_data):
+        """
+        Отправляет email-уведомления группе получателей через одно SMTP-соединение
+        
+        Args:
+            recipients: Список получателей с заполненным email
+            notification_type: Тип уведомления
+            title: Заголовок
+            message: Сообщение
+            extra_data: Дополнительные данные
+        """
+        if not recipients:
+            return
+        
+        connection = mail.get_connection(fail_silently=False)
+        
+        emails = []
+        for recipient in recipients:
+            try:
+                emails.append(NotificationService._build_email_message(
+                    recipient, notification_type, title, message, extra_data,
+                    connection=connection
+                ))
+            except Exception as e:
+                logger.error(f"Ошибка при подготовке email-уведомления для {recipient.username}: {e}")
+        
         try:
-            # Определяем шаблон для email
-            template_map = {
-                NotificationType.TEAM_DEACTIVATED: 'notifications/email/team_deactivated.html',
-                NotificationType.TEAM_REACTIVATED: 'notifications/email/team_reactivated.html',
-                NotificationType.TEAM_DISBANDED: 'notifications/email/team_disbanded.html',
-                NotificationType.TEAM_INVITATION: 'notifications/email/team_invitation.html',
-                NotificationType.TASK_ASSIGNED: 'notifications/email/task_assigned.html',
-                NotificationType.PROJECT_UPDATE: 'notifications/email/project_update.html',
-                NotificationType.COMMENT_MENTION: 'notifications/email/comment_mention.html',
-            }
-            
-            template_name = template_map.get(notification_type, 'notifications/email/default.html')
-            
-            # Контекст для шаблона
-            context = {
-                'recipient': recipient,
-                'title': title,
-                'message': message,
-                'extra_data': extra_data,
-                'site_name': getattr(settings, 'SITE_NAME', 'MangaCollab'),
-            }
-            
-            # Рендерим HTML и текстовую версию
-            html_message = render_to_string(template_name, context)
-            text_message = render_to_string(
-                template_name.replace('.html', '.txt'), 
-                context
-            )
-            
-            # Отправляем email
-            send_mail(
-                subject=f"[MangaCollab] {title}",
-                message=text_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[recipient.email],
-                html_message=html_message,
-                fail_silently=False
-            )
-            
-            logger.info(f"Отправлено email-уведомление для {recipient.username} ({recipient.email})")
-            
+            sent_count = connection.send_messages(emails)
+            logger.info(f"Отправлено {sent_count} email-уведомлений ({notification_type})")
         except Exception as e:
-            logger.error(f"Ошибка при отправке email-уведомления для {recipient.username}: {e}")
+            logger.error(f"Ошибка при массовой отправке email-уведомлений ({notification_type}): {e}")
     
     @staticmethod
     def get_unread_count(user):
-        """Возвращает количество непрочитанных уведомлений пользователя"""
-        return Notification.objects.filter(recipient=user, is_read=False).count()
+        """
+        Возвращает количество непрочитанных уведомлений пользователя
+        
+        Значение берется из денормализованного счетчика
+        UserNotificationPreferences.unread_count одним запросом по строке
+        настроек, а не COUNT по уведомлениям. Счетчик не кэшируется:
+        локальный кэш процесса не сбрасывается, когда уведомления создает
+        фоновый обработчик или другой процесс веб-сервера.
+        """
+        return UserNotificationPreferences.objects.filter(
+            user_id=user.id
+        ).values_list('unread_count', flat=True).first() or 0
+    
+    @staticmethod
+    def get_total_count(user):
+        """Возвращает общее количество уведомлений пользователя"""
+        return Notification.objects.filter(recipient_id=user.id).count()
+    
+    @staticmethod
+    def change_unread_count(user_ids, delta):
+        """
+        Атомарно изменяет счетчик непрочитанных уведомлений пользователей
+        
+        Args:
+            user_ids: ID пользователей
+            delta: Величина изменения (отрицательная для уменьшения, не опускается ниже нуля)
+        """
+        user_ids = set(user_ids)
+        if not user_ids or not delta:
+            return
+        
+        # Пользователям без настроек создаем строку и считаем счетчик по таблице
+        # уведомлений: прибавлять delta к нулю по умолчанию было бы неверно
+        missing_ids = NotificationService._create_missing_preferences(user_ids)
+        existing_ids = user_ids - missing_ids
+        if existing_ids:
+            UserNotificationPreferences.objects.filter(user_id__in=existing_ids).update(
+                unread_count=Greatest(F('unread_count') + delta, 0)
+            )
+        if missing_ids:
+            NotificationService.recount_unread(*missing_ids)
+    
+    @staticmethod
+    def recount_unread(*user_ids):
+        """
+        Пересчитывает счетчик непрочитанных уведомлений по таблице уведомлений
+        
+        Используется там, где точное изменение счетчика неизвестно
+        (редактирование в админке, массовые действия).
+        """
+        if not user_ids:
+            return
+        
+        NotificationService._create_missing_preferences(user_ids)
+        unread = Notification.objects.filter(
+            recipient_id=OuterRef('user_id'), is_read=False
+        ).order_by().values('recipient_id').annotate(total=Count('id')).values('total')
+        
+        UserNotificationPreferences.objects.filter(user_id__in=set(user_ids)).update(
+            unread_count=Coalesce(Subquery(unread), 0)
+        )
+    
+    @staticmethod
+    def _create_missing_preferences(user_ids):
+        """
+        Создает настройки по умолчанию для пользователей, у которых их еще нет
+        
+        Returns:
+            set: ID пользователей, для которых настройки отсутствовали
+        """
+        user_ids = set(user_ids)
+        existing_ids = set(
+            UserNotificationPreferences.objects.filter(
+                user_id__in=user_ids
+            ).values_list('user_id', flat=True)
+        )
+        missing_ids = user_ids - existing_ids
+        if missing_ids:
+            UserNotificationPreferences.objects.bulk_create(
+                [UserNotificationPreferences(user_id=user_id) for user_id in missing_ids],
+                ignore_conflicts=True
+            )
+        return missing_ids
     
     @staticmethod
     def mark_all_as_read(user):
@@ -223,5 +446,8 @@ class NotificationService:
             is_read=True,
             read_at=timezone.now()
         )
+        # Пересчет, а не обнуление: уведомление, созданное между двумя запросами,
+        # иначе пропало бы из счетчика
+        NotificationService.recount_unread(user.id)
         logger.info(f"Отмечено как прочитанные {count} уведомлений для {user.username}")
         return count
\ No newline at end of file
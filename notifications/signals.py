@@ -0,0 +1,30 @@
+"""
+Сигналы приложения notifications.
+
+Поддерживают счетчик непрочитанных уведомлений при
+создании, изменении или удалении отдельного уведомления.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Notification
+from .services import NotificationService
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_count_on_save(sender, instance, created, **kwargs):
+    """Обновляет счетчик непрочитанных уведомлений получателя"""
+    if created:
+        if not instance.is_read:
+            NotificationService.change_unread_count([instance.recipient_id], 1)
+    else:
+        # Предыдущее значение is_read неизвестно - пересчитываем
+        NotificationService.recount_unread(instance.recipient_id)
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_count_on_delete(sender, instance, **kwargs):
+    """Уменьшает счетчик при удалении непрочитанного уведомления"""
+    if not instance.is_read:
+        NotificationService.change_unread_count([instance.recipient_id], -1)
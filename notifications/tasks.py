@@ -0,0 +1,48 @@
+"""
+Фоновые задачи для рассылки уведомлений
+
+Задачи выполняются воркером django-background-tasks
+(python manage.py process_tasks), поэтому HTTP-запрос, изменивший
+статус команды, не ждет рендеринга писем и отправки по SMTP.
+"""
+
+from background_task import background
+from django.contrib.auth import get_user_model
+import logging
+
+from .services import NotificationService
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+@background(schedule=0)
+def send_team_status_notification_task(team_id, change_type, changed_by_id, reason=""):
+    """
+    Рассылает уведомления об изменении статуса команды в фоне
+
+    В задачу передаются только первичные ключи, объекты заново
+    загружаются из БД в момент выполнения.
+
+    Args:
+        team_id: ID команды
+        change_type: Тип изменения (TeamStatusChangeType)
+        changed_by_id: ID пользователя, выполнившего изменение
+        reason: Причина изменения
+    """
+    from teams.models import Team
+
+    try:
+        team = Team.objects.get(pk=team_id)
+        changed_by = User.objects.get(pk=changed_by_id)
+    except (Team.DoesNotExist, User.DoesNotExist):
+        logger.warning(f"Пропущена рассылка уведомлений: команда {team_id} "
+                       f"или пользователь {changed_by_id} не найдены")
+        return
+
+    NotificationService.send_team_status_notification(
+        team=team,
+        change_type=change_type,
+        changed_by=changed_by,
+        reason=reason
+    )
@@ -1,25 +1,49 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, View
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, Http404
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import base64
+import binascii
 
 from .models import Notification, UserNotificationPreferences
 from .services import NotificationService
 
+# Поля настроек уведомлений, управляемые чекбоксами формы
+PREF_FIELDS = (
+    'email_team_status_changes',
+    'email_team_invitations',
+    'email_task_assignments',
+    'email_project_updates',
+    'email_comment_mentions',
+    'web_team_status_changes',
+    'web_team_invitations',
+    'web_task_assignments',
+    'web_project_updates',
+    'web_comment_mentions',
+)
+
 
 class NotificationListView(LoginRequiredMixin, ListView):
     """Список уведомлений пользователя"""
     model = Notification
     template_name = 'notifications/notification_list.html'
     context_object_name = 'notifications'
-    paginate_by = 20
+    
+    # Keyset-пагинация по (created_at, id): стоимость страницы не зависит
+    # от ее глубины и не требует COUNT всего списка
+    page_size = 20
     
     def get_queryset(self):
         """Получаем уведомления текущего пользователя"""
-        queryset = Notification.objects.filter(recipient=self.request.user)
+        # Загружаем только поля, которые выводятся в списке (без extra_data и recipient)
+        queryset = Notification.objects.filter(recipient=self.request.user).only(
+            'id', 'notification_type', 'title', 'message', 'is_read', 'created_at', 'read_at'
+        )
         
         # Фильтрация по статусу прочтения
         status_filter = self.request.GET.get('status')
@@ -30,18 +54,74 @@ class NotificationListView(LoginRequiredMixin, ListView):
         
         # Фильтрация по типу уведомления
         type_filter = self.request.GET.get('type')
-        if type_filter:
+        if type_filter and type_filter != 'all':
             queryset = queryset.filter(notification_type=type_filter)
         
-        return queryset.order_by('-created_at')
+        return queryset
+    
+    @staticmethod
+    def encode_cursor(notification):
+        """Кодирует позицию уведомления в списке для параметров after/before"""
+        raw = f"{notification.created_at.isoformat()}|{notification.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """Декодирует курсор в пару (created_at, id); для некорректного курсора возвращает None"""
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            return None
+        if created_at is None:
+            return None
+        return created_at, pk
+    
+    def paginate_by_cursor(self, queryset):
+        """
+        Возвращает страницу уведомлений и курсоры соседних страниц
+        
+        Returns:
+            tuple: (список уведомлений, курсор следующей страницы, курсор предыдущей страницы)
+        """
+        after = self.decode_cursor(self.request.GET.get('after', ''))
+        before = self.decode_cursor(self.request.GET.get('before', ''))
+        
+        if before:
+            # Более новые уведомления: идем вверх по индексу и разворачиваем результат
+            created_at, pk = before
+            rows = list(queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')[:self.page_size + 1])
+            has_previous = len(rows) > self.page_size
+            rows = rows[:self.page_size][::-1]
+            has_next = True
+        else:
+            if after:
+                created_at, pk = after
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            rows = list(queryset.order_by('-created_at', '-id')[:self.page_size + 1])
+            has_next = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            has_previous = after is not None
+        
+        next_cursor = self.encode_cursor(rows[-1]) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0]) if rows and has_previous else None
+        return rows, next_cursor, previous_cursor
     
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        notifications, next_cursor, previous_cursor = self.paginate_by_cursor(self.object_list)
+        context = super().get_context_data(object_list=notifications, **kwargs)
+        context['next_cursor'] = next_cursor
+        context['previous_cursor'] = previous_cursor
+        context['is_paginated'] = bool(next_cursor or previous_cursor)
         
-        # Статистика уведомлений
-        user_notifications = Notification.objects.filter(recipient=self.request.user)
-        context['unread_count'] = user_notifications.filter(is_read=False).count()
-        context['total_count'] = user_notifications.count()
+        # Статистика уведомлений (оба значения кэшируются в NotificationService)
+        context['unread_count'] = NotificationService.get_unread_count(self.request.user)
+        context['total_count'] = NotificationService.get_total_count(self.request.user)
         
         # Текущие фильтры
         context['current_status_filter'] = self.request.GET.get('status', 'all')
@@ -55,13 +135,18 @@ class MarkNotificationReadView(LoginRequiredMixin, View):
     
     def post(self, request, pk):
         """Отмечает уведомление как прочитанное"""
-        notification = get_object_or_404(
-            Notification, 
-            pk=pk, 
-            recipient=request.user
-        )
-        
-        notification.mark_as_read()
+        # Обновляем без предварительной загрузки объекта
+        updated = Notification.objects.filter(
+            pk=pk,
+            recipient=request.user,
+            is_read=False
+        ).update(is_read=True, read_at=timezone.now())
+        
+        if updated:
+            # update() не отправляет сигналы - обновляем счетчик вручную
+            NotificationService.change_unread_count([request.user.id], -1)
+        elif not Notification.objects.filter(pk=pk, recipient=request.user).exists():
+            raise Http404('Уведомление не найдено')
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -106,23 +191,15 @@ class NotificationPreferencesView(LoginRequiredMixin, View):
     
     def post(self, request):
         """Сохраняет настройки уведомлений"""
-        preferences = UserNotificationPreferences.get_or_create_for_user(request.user)
-        
-        # Обновляем настройки email уведомлений
-        preferences.email_team_status_changes = 'email_team_status_changes' in request.POST
-        preferences.email_team_invitations = 'email_team_invitations' in request.POST
-        preferences.email_task_assignments = 'email_task_assignments' in request.POST
-        preferences.email_project_updates = 'email_project_updates' in request.POST
-        preferences.email_comment_mentions = 'email_comment_mentions' in request.POST
-        
-        # Обновляем настройки веб уведомлений
-        preferences.web_team_status_changes = 'web_team_status_changes' in request.POST
-        preferences.web_team_invitations = 'web_team_invitations' in request.POST
-        preferences.web_task_assignments = 'web_task_assignments' in request.POST
-        preferences.web_project_updates = 'web_project_updates' in request.POST
-        preferences.web_comment_mentions = 'web_comment_mentions' in request.POST
-        
-        preferences.save()
+        # Отмеченные чекбоксы присутствуют в POST, снятые - отсутствуют
+        posted = request.POST.keys() & PREF_FIELDS
+        
+        # update_or_create сохраняет только переданные поля (и updated_at), поэтому
+        # параллельно обновляемый счетчик unread_count не перезаписывается
+        UserNotificationPreferences.objects.update_or_create(
+            user=request.user,
+            defaults={field: field in posted for field in PREF_FIELDS}
+        )
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -141,6 +218,8 @@ class GetUnreadCountView(LoginRequiredMixin, View):
         """Возвращает количество непрочитанных уведомлений"""
         count = NotificationService.get_unread_count(request.user)
         
-        return JsonResponse({
-            'unread_count': count
-        })
+        # Эндпоинт опрашивается из навбара - тривиальный JSON собираем без энкодера
+        return HttpResponse(
+            f'{{"unread_count": {int(count)}}}',
+            content_type='application/json'
+        )
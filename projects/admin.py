@@ -14,6 +14,32 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import Project, Chapter
 
+
+def render_status_badge(badge_class, description, icon, status_text):
+    """Формирует HTML badge статуса проекта с иконкой и подсказкой"""
+    return format_html(
+        '<span class="badge {}" style="color: white; padding: 4px 8px; border-radius: 4px;" '
+        'title="{}">'
+        '<i class="{}" style="margin-right: 4px;"></i>{}</span>',
+        badge_class.replace('badge ', ''),  # Убираем 'badge' для кастомного стиля
+        description,  # Добавляем описание в title для tooltip
+        icon,
+        status_text
+    )
+
+
+# HTML зависит только от статуса, поэтому badge для каждого статуса строится один раз
+STATUS_BADGE_HTML = {
+    status: render_status_badge(
+        Project.STATUS_BADGE_CLASSES.get(status, 'bg-secondary'),
+        Project.STATUS_DESCRIPTIONS.get(status, 'Неизвестный статус'),
+        Project.STATUS_ICONS.get(status, 'fas fa-question-circle'),
+        status_text
+    )
+    for status, status_text in Project.STATUS_CHOICES
+}
+
+
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     # Показывает название, команду, статус с визуальным индикатором и дату создания в списке проектов.
@@ -42,20 +68,16 @@ class ProjectAdmin(admin.ModelAdmin):
     
     def status_display(self, obj):
         """Отображает статус с визуальным индикатором в админке"""
-        badge_class = obj.get_status_badge_class()
-        icon = obj.get_status_icon()
-        status_text = obj.get_status_display()
-        description = obj.get_status_description()
-        
-        return format_html(
-            '<span class="badge {}" style="color: white; padding: 4px 8px; border-radius: 4px;" '
-            'title="{}">'
-            '<i class="{}" style="margin-right: 4px;"></i>{}</span>',
-            badge_class.replace('badge ', ''),  # Убираем 'badge' для кастомного стиля
-            description,  # Добавляем описание в title для tooltip
-            icon,
-            status_text
-        )
+        html = STATUS_BADGE_HTML.get(obj.status)
+        if html is None:
+            # Статус вне STATUS_CHOICES (например, старые данные)
+            html = render_status_badge(
+                obj.get_status_badge_class(),
+                obj.get_status_description(),
+                obj.get_status_icon(),
+                obj.get_status_display()
+            )
+        return html
     
     status_display.short_description = 'Статус'
     status_display.admin_order_field = 'status'
@@ -80,4 +102,6 @@ class ChapterAdmin(admin.ModelAdmin):
     # Добавляет поиск по названию.
     search_fields = ('title',)
     # Включает удобный поиск для полей с ForeignKey.
-    autocomplete_fields = ('project', 'assignee')
\ No newline at end of file
+    autocomplete_fields = ('project', 'assignee')
+    # Проект и ответственный выводятся в списке - загружаем их одним JOIN.
+    list_select_related = ('project', 'assignee')
\ No newline at end of file
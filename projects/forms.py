@@ -2,9 +2,13 @@
 
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from .models import Project
 from .utils import generate_content_folder
 
+# Сколько раз пересоздавать имя папки, если его успел занять параллельный запрос
+CONTENT_FOLDER_SAVE_ATTEMPTS = 3
+
 
 class ProjectForm(forms.ModelForm):
     """Форма для создания/редактирования проектов манги/манхвы"""
@@ -48,11 +52,17 @@ class ProjectForm(forms.ModelForm):
         else:
             # Ограничиваем команды только активными командами пользователя
             if user:
-                from teams.models import Team
+                from teams.models import Team, TeamMembership
+                # IN-подзапрос по членствам вместо JOIN + DISTINCT;
+                # для <select> достаточно id и name (Team.__str__)
+                team_ids = TeamMembership.objects.filter(
+                    user=user,
+                    is_active=True
+                ).values('team_id')
                 self.fields['team'].queryset = Team.objects.filter(
-                    members=user,
+                    id__in=team_ids,
                     status='active'
-                ).distinct()
+                ).only('id', 'name')
         
         # Делаем поля обязательными
         self.fields['title'].required = True
@@ -77,16 +87,6 @@ class ProjectForm(forms.ModelForm):
             raise ValidationError('Название должно содержать минимум 3 символа')
         return title.strip()
     
-    def clean_status(self):
-        """Валидация статуса проекта"""
-        status = self.cleaned_data.get('status')
-        valid_statuses = [choice[0] for choice in Project.STATUS_CHOICES]
-        
-        if status and status not in valid_statuses:
-            raise ValidationError('Выберите корректный статус проекта')
-        
-        return status
-    
     def clean(self):
         """Общая валидация формы"""
         cleaned_data = super().clean()
@@ -117,8 +117,29 @@ class ProjectForm(forms.ModelForm):
                 raise ValidationError(f'Ошибка генерации папки: {str(e)}')
         
         if commit:
-            instance.save()
+            self._save_with_unique_folder(instance)
         return instance
+    
+    def _save_with_unique_folder(self, instance):
+        """
+        Сохраняет проект, полагаясь на уникальный индекс (team, content_folder)
+        
+        Имя папки выбирается заранее, но между проверкой и INSERT его может
+        занять параллельный запрос. В этом случае имя генерируется заново.
+        """
+        for attempt in range(CONTENT_FOLDER_SAVE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    instance.save()
+                return
+            except IntegrityError:
+                if attempt == CONTENT_FOLDER_SAVE_ATTEMPTS - 1 or not instance.team:
+                    raise
+                instance.content_folder = generate_content_folder(
+                    instance.title,
+                    instance.team,
+                    instance.id
+                )
 
 
 class ProjectEditForm(forms.ModelForm):
@@ -170,16 +191,6 @@ class ProjectEditForm(forms.ModelForm):
             raise ValidationError('Название должно содержать минимум 3 символа')
         return title.strip()
     
-    def clean_status(self):
-        """Валидация статуса проекта"""
-        status = self.cleaned_data.get('status')
-        valid_statuses = [choice[0] for choice in Project.STATUS_CHOICES]
-        
-        if status and status not in valid_statuses:
-            raise ValidationError('Выберите корректный статус проекта')
-        
-        return status
-    
     def clean(self):
         """Общая валидация формы"""
         cleaned_data = super().clean()
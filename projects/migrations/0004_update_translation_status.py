@@ -1,5 +1,17 @@
 # Generated manually for project translation status update
 from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+
+def apply_status_mapping(Project, status_mapping):
+    """
+    Переводит статусы проектов по маппингу одним UPDATE с CASE WHEN.
+    Затрагиваются только строки, статус которых действительно меняется.
+    """
+    changed = {old: new for old, new in status_mapping.items() if old != new}
+    return Project.objects.filter(status__in=changed).update(status=Case(
+        *[When(status=old, then=Value(new)) for old, new in changed.items()]
+    ))
 
 
 def update_existing_statuses(apps, schema_editor):
@@ -18,10 +30,9 @@ def update_existing_statuses(apps, schema_editor):
     }
     
     # Обновляем статусы проектов согласно маппингу
-    for old_status, new_status in status_mapping.items():
-        updated_count = Project.objects.filter(status=old_status).update(status=new_status)
-        if updated_count > 0:
-            print(f"Обновлено {updated_count} проектов со статуса '{old_status}' на '{new_status}'")
+    updated_count = apply_status_mapping(Project, status_mapping)
+    if updated_count > 0:
+        print(f"Обновлено статусов проектов: {updated_count}")
 
 
 def reverse_existing_statuses(apps, schema_editor):
@@ -40,10 +51,9 @@ def reverse_existing_statuses(apps, schema_editor):
     }
     
     # Откатываем статусы проектов
-    for new_status, old_status in reverse_status_mapping.items():
-        updated_count = Project.objects.filter(status=new_status).update(status=old_status)
-        if updated_count > 0:
-            print(f"Откат: обновлено {updated_count} проектов со статуса '{new_status}' на '{old_status}'")
+    updated_count = apply_status_mapping(Project, reverse_status_mapping)
+    if updated_count > 0:
+        print(f"Откат: обновлено статусов проектов: {updated_count}")
 
 
 class Migration(migrations.Migration):
@@ -1,8 +1,9 @@
 # projects/models.py
 
 from django.db import models
+from django.db.models import Prefetch
 # Импортируем модель Team, чтобы связать проекты с командами.
-from teams.models import Team
+from teams.models import Team, TeamMembership
 # Импортируем модель User, чтобы назначать ответственных.
 from django.conf import settings
 
@@ -60,6 +61,8 @@ class Project(models.Model):
         ('completed', 'Переведён'),        # Все главы готовы
         ('frozen', 'Заморожен'),           # Временная приостановка
     ]
+    # Подписи статусов по значению (для массового вывода без get_status_display)
+    STATUS_CHOICES_MAP = dict(STATUS_CHOICES)
     status = models.CharField(
         max_length=20, 
         choices=STATUS_CHOICES, 
@@ -73,58 +76,69 @@ class Project(models.Model):
         # Уникальность папки только в рамках команды
         unique_together = [['team', 'content_folder']]
 
+    # Оформление статусов (создается один раз при загрузке класса)
+    STATUS_BADGE_CLASSES = {
+        'translating': 'bg-primary',
+        'dropped': 'bg-secondary',
+        'completed': 'bg-success',
+        'frozen': 'bg-warning',
+    }
+    STATUS_ICONS = {
+        'translating': 'fas fa-language',
+        'dropped': 'fas fa-stop-circle',
+        'completed': 'fas fa-check-circle',
+        'frozen': 'fas fa-pause-circle',
+    }
+    STATUS_DESCRIPTIONS = {
+        'translating': 'Проект активно переводится командой',
+        'dropped': 'Команда прекратила работу над проектом',
+        'completed': 'Все главы проекта переведены и готовы',
+        'frozen': 'Работа временно приостановлена (перерыв, ожидание новых глав)',
+    }
+
     def get_status_badge_class(self):
         """Возвращает CSS класс для badge статуса"""
-        status_classes = {
-            'translating': 'bg-primary',
-            'dropped': 'bg-secondary', 
-            'completed': 'bg-success',
-            'frozen': 'bg-warning',
-        }
-        return f"badge {status_classes.get(self.status, 'bg-secondary')}"
+        return f"badge {self.STATUS_BADGE_CLASSES.get(self.status, 'bg-secondary')}"
 
     def get_status_icon(self):
         """Возвращает иконку FontAwesome для статуса"""
-        status_icons = {
-            'translating': 'fas fa-language',
-            'dropped': 'fas fa-stop-circle',
-            'completed': 'fas fa-check-circle', 
-            'frozen': 'fas fa-pause-circle',
-        }
-        return status_icons.get(self.status, 'fas fa-question-circle')
+        return self.STATUS_ICONS.get(self.status, 'fas fa-question-circle')
 
     def get_status_description(self):
         """Возвращает описание статуса для подсказок"""
-        descriptions = {
-            'translating': 'Проект активно переводится командой',
-            'dropped': 'Команда прекратила работу над проектом',
-            'completed': 'Все главы проекта переведены и готовы',
-            'frozen': 'Работа временно приостановлена (перерыв, ожидание новых глав)',
-        }
-        return descriptions.get(self.status, 'Неизвестный статус')
+        return self.STATUS_DESCRIPTIONS.get(self.status, 'Неизвестный статус')
 
     def user_has_access(self, user):
         """Проверяет, имеет ли пользователь доступ к проекту через активное членство в команде"""
-        return (
-            self.team.members.filter(
-                id=user.id,
-                teammembership__is_active=True
-            ).exists() and 
-            self.team.status == 'active'
-        )
+        # Один EXISTS-запрос: членство и статус команды проверяются вместе,
+        # без загрузки самой команды
+        return TeamMembership.objects.filter(
+            team_id=self.team_id,
+            user_id=user.id,
+            is_active=True,
+            team__status='active'
+        ).exists()
     
     def get_active_members(self):
         """Возвращает активных участников команды проекта"""
+        # teammembership - обратная связь, select_related для нее не работает;
+        # активные членства подгружаются одним дополнительным запросом
         return self.team.members.filter(
             teammembership__is_active=True
-        ).select_related('teammembership')
+        ).prefetch_related(
+            Prefetch(
+                'teammembership_set',
+                queryset=TeamMembership.objects.filter(team_id=self.team_id, is_active=True),
+                to_attr='active_memberships'
+            )
+        )
     
     def can_be_edited_by(self, user):
         """Проверяет, может ли пользователь редактировать проект"""
-        return (
-            self.user_has_access(user) and 
-            (self.team.creator == user or user.is_superuser)
-        )
+        if not self.user_has_access(user):
+            return False
+        # Сравниваем по creator_id, чтобы не загружать создателя команды
+        return user.is_superuser or self.team.creator_id == user.id
 
     def __str__(self):
         # Возвращает название проекта в виде строки (удобно для админки).
@@ -158,6 +172,8 @@ class Chapter(models.Model):
         ('editing', 'Редактура'),
         ('done', 'Готово'),
     )
+    # Подписи статусов по значению (для массового вывода без get_status_display)
+    STATUS_CHOICES_MAP = dict(STATUS_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='raw')
     # Дата создания главы, заполняется автоматически.
     created_at = models.DateTimeField(auto_now_add=True)
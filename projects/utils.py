@@ -1,8 +1,20 @@
 # projects/utils.py
 
+import json
+import os
 import re
+import time
+import zipfile
 from django.utils.text import slugify
 
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+# Допустимые символы имени папки (\Z, в отличие от $, не пропускает завершающий \n)
+FOLDER_NAME_RE = re.compile(r'^[a-zA-Z0-9_-]+\Z')
+
 
 def generate_content_folder(title, team, project_id=None):
     """
@@ -27,24 +39,28 @@ def generate_content_folder(title, team, project_id=None):
     base_name = base_name[:50]
     
     # Проверяем уникальность ТОЛЬКО в рамках команды
-    folder_name = base_name
-    counter = 1
+    from .models import Project
+    queryset = Project.objects.filter(team=team)  # Уникальность только в рамках команды
+    # Исключаем текущий проект при обновлении
+    if project_id:
+        queryset = queryset.exclude(id=project_id)
     
-    while True:
-        # Исключаем текущий проект при обновлении
-        from .models import Project
-        queryset = Project.objects.filter(
-            content_folder=folder_name,
-            team=team  # Уникальность только в рамках команды
-        )
-        if project_id:
-            queryset = queryset.exclude(id=project_id)
-            
-        if not queryset.exists():
-            break
-            
-        folder_name = f"{base_name}_{counter}"
+    # Обычно имя свободно - достаточно EXISTS по точному совпадению
+    if not queryset.filter(content_folder=base_name).exists():
+        return base_name
+    
+    # При коллизии одним запросом получаем все занятые имена с суффиксом
+    # и ищем свободное локально
+    existing = set(
+        queryset.filter(content_folder__startswith=f'{base_name}_')
+        .values_list('content_folder', flat=True)
+    )
+    
+    counter = 1
+    folder_name = f"{base_name}_{counter}"
+    while folder_name in existing:
         counter += 1
+        folder_name = f"{base_name}_{counter}"
     
     return folder_name
 
@@ -65,10 +81,160 @@ def validate_folder_name(folder_name):
     if not folder_name:
         raise ValueError('Имя папки не может быть пустым')
     
-    if not re.match(r'^[a-zA-Z0-9_-]+$', folder_name):
+    if not FOLDER_NAME_RE.match(folder_name):
         raise ValueError('Папка может содержать только буквы, цифры, дефисы и подчеркивания')
     
     if len(folder_name) > 100:
         raise ValueError('Имя папки не может быть длиннее 100 символов')
         
-    return True
\ No newline at end of file
+    return True
+
+
+# Размер блока при копировании файлов контента в потоковый архив
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+# Уже сжатые форматы: повторное сжатие DEFLATE тратит CPU почти без выигрыша
+INCOMPRESSIBLE_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif',
+    '.zip', '.rar', '.7z', '.gz', '.mp4', '.pdf',
+})
+
+
+def dump_project_manifest(project_info):
+    """
+    Сериализует информацию о проекте для project_info.json (UTF-8, отступ 2)
+
+    При наличии orjson использует его, иначе стандартный json.
+
+    Returns:
+        bytes: JSON в кодировке UTF-8
+    """
+    if orjson is not None:
+        return orjson.dumps(project_info, option=orjson.OPT_INDENT_2)
+    return json.dumps(project_info, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def iter_project_manifest(project_info, chapters):
+    """
+    Сериализует project_info.json по частям: шапка проекта, затем главы по одной
+
+    Список глав не собирается в памяти целиком, поэтому память не зависит
+    от числа глав. Результат совпадает с dump_project_manifest для словаря
+    с ключом 'chapters' в конце.
+
+    Args:
+        project_info: Информация о проекте (непустой словарь без глав)
+        chapters: Итерируемый набор словарей с данными глав
+
+    Yields:
+        bytes: Очередная часть JSON
+    """
+    # Шапка без закрывающей скобки: '{\n  ...\n}' -> '{\n  ...'
+    yield dump_project_manifest(project_info)[:-2] + b',\n  "chapters": ['
+
+    separator = b'\n    '
+    empty = True
+    for chapter in chapters:
+        yield separator + dump_project_manifest(chapter).replace(b'\n', b'\n    ')
+        separator = b',\n    '
+        empty = False
+
+    yield b']\n}' if empty else b'\n  ]\n}'
+
+
+class ZipStreamBuffer:
+    """
+    Файлоподобный приемник для zipfile, накапливающий байты до следующей выдачи
+
+    Не поддерживает seek/tell, поэтому zipfile пишет архив последовательно
+    (с дескрипторами данных), что и требуется для потоковой отдачи.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self):
+        """Возвращает накопленные байты и очищает буфер"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_content_files(root):
+    """
+    Обходит папку рекурсивно через os.scandir и возвращает файлы (DirEntry)
+
+    В отличие от os.walk не строит списки имен для каждой папки;
+    символические ссылки на папки не обходятся. Отсутствующая папка
+    (в том числе корневая) просто пропускается, без отдельной проверки exists.
+    """
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+
+
+def stream_project_archive(project_manifest, content_path=None):
+    """
+    Генератор ZIP-архива проекта для StreamingHttpResponse
+
+    Архив отдается частями по мере записи, поэтому память не зависит
+    от размера проекта, а первые байты уходят клиенту сразу.
+
+    Args:
+        project_manifest: Части project_info.json (bytes), например из iter_project_manifest
+        content_path: Папка с файлами контента проекта (может отсутствовать)
+
+    Yields:
+        bytes: Очередная часть архива
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        manifest_info = zipfile.ZipInfo('project_info.json', date_time=time.localtime()[:6])
+        manifest_info.compress_type = zip_file.compression
+        manifest_info.external_attr = 0o600 << 16
+        with zip_file.open(manifest_info, 'w') as target:
+            for part in project_manifest:
+                target.write(part)
+                yield buffer.read()
+        yield buffer.read()
+
+        if content_path:
+            # Пути от scandir начинаются с content_path, поэтому относительный
+            # путь для архива получается срезом, без os.path.relpath на каждый файл
+            content_path = content_path.rstrip(os.sep)
+            prefix = len(content_path) + 1
+            # Файлы читаются в порядке номеров inode: на ext4/xfs это близко к порядку
+            # размещения на диске, и чтение идет почти последовательно.
+            # DirEntry.inode() на POSIX берется из d_ino без дополнительного stat
+            entries = sorted(iter_content_files(content_path), key=lambda entry: entry.inode())
+            for entry in entries:
+                zip_info = zipfile.ZipInfo.from_file(entry.path, 'content/' + entry.path[prefix:])
+                if os.path.splitext(entry.name)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+                    zip_info.compress_type = zipfile.ZIP_STORED
+                else:
+                    zip_info.compress_type = zip_file.compression
+
+                with open(entry.path, 'rb') as source, zip_file.open(zip_info, 'w') as target:
+                    while chunk := source.read(ARCHIVE_CHUNK_SIZE):
+                        target.write(chunk)
+                        yield buffer.read()
+                yield buffer.read()
+
+    # Центральный каталог записывается при закрытии архива
+    yield buffer.read()
@@ -2,16 +2,44 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-import json
+from django.db.models import Exists, OuterRef
 import os
 import shutil
-import zipfile
-from io import BytesIO
 from .models import Project, Chapter
 from .forms import ProjectForm, ProjectEditForm
+from .utils import iter_project_manifest, stream_project_archive
+
+# Поля проекта, которые читает delete_project
+DELETE_PROJECT_FIELDS = ('title', 'content_folder', 'team__id', 'team__creator_id')
+
+
+def get_project_with_membership(pk, user, fields=None):
+    """
+    Возвращает проект с командой и флагом user_is_member (или 404)
+    
+    Членство пользователя в команде проекта вычисляется подзапросом EXISTS
+    в том же SELECT, без отдельного запроса в каждом представлении.
+    
+    Args:
+        pk: ID проекта
+        user: Текущий пользователь
+        fields: Поля для .only(), если представлению нужна не вся строка
+    """
+    from teams.models import TeamMembership
+    
+    queryset = Project.objects.select_related('team').annotate(
+        user_is_member=Exists(
+            TeamMembership.objects.filter(
+                team_id=OuterRef('team_id'), user_id=user.id, is_active=True
+            )
+        )
+    )
+    if fields:
+        queryset = queryset.only(*fields)
+    return get_object_or_404(queryset, pk=pk)
 
 
 @login_required
@@ -24,15 +52,18 @@ def create_project(request):
         messages.error(request, 'Проекты можно создавать только из команды.')
         return redirect('teams:team_list')
     
-    # Проверяем доступ к команде
-    try:
-        from teams.models import Team
-        selected_team = Team.objects.get(
-            id=team_id,
-            status='active',
-            members=request.user
+    # Проверяем доступ к команде: членство - подзапросом EXISTS вместо JOIN
+    # через участников, из команды читаются только поля для формы и шаблона
+    from teams.models import Team, TeamMembership
+    selected_team = Team.objects.filter(id=team_id, status='active').annotate(
+        user_is_member=Exists(
+            TeamMembership.objects.filter(
+                team_id=OuterRef('pk'), user_id=request.user.id, is_active=True
+            )
         )
-    except Team.DoesNotExist:
+    ).only('id', 'name', 'status').first()
+    
+    if selected_team is None or not selected_team.user_is_member:
         messages.error(request, 'Команда не найдена или у вас нет доступа к ней.')
         return redirect('teams:team_list')
     
@@ -61,10 +92,10 @@ def create_project(request):
 @login_required
 def project_detail(request, pk):
     """Детальная страница проекта"""
-    project = get_object_or_404(Project, pk=pk)
+    project = get_project_with_membership(pk, request.user)
     
     # Проверяем доступ через команду
-    if not project.team.members.filter(id=request.user.id).exists():
+    if not project.user_is_member:
         raise PermissionDenied("У вас нет доступа к этому проекту")
     
     # Получаем главы проекта
@@ -79,9 +110,12 @@ def project_detail(request, pk):
 @login_required
 def project_list(request):
     """Список проектов пользователя"""
-    # Получаем проекты только из команд пользователя
+    from teams.models import TeamMembership
+    
+    # Получаем проекты только из команд с активным членством пользователя (IN-подзапрос вместо JOIN через участников)
+    team_ids = TeamMembership.objects.filter(user=request.user, is_active=True).values('team_id')
     projects = Project.objects.filter(
-        team__members=request.user,
+        team_id__in=team_ids,
         team__status='active'
     ).select_related('team').order_by('-created_at')
     
@@ -93,10 +127,10 @@ def project_list(request):
 @login_required
 def edit_project(request, pk):
     """Редактирование проекта"""
-    project = get_object_or_404(Project, pk=pk)
+    project = get_project_with_membership(pk, request.user)
     
     # Проверяем права на редактирование
-    if not project.team.members.filter(id=request.user.id).exists():
+    if not project.user_is_member:
         raise PermissionDenied("У вас нет доступа к этому проекту")
     
     if request.method == 'POST':
@@ -125,10 +159,11 @@ def delete_project(request, pk):
     """Удаление проекта с полной очисткой данных"""
     from utils.file_system import FileCleanupManager, FileCleanupError
     
-    project = get_object_or_404(Project, pk=pk)
+    # Для удаления нужны только название, папка и команда проекта
+    project = get_project_with_membership(pk, request.user, fields=DELETE_PROJECT_FIELDS)
     
     # Проверяем права на удаление (только члены команды)
-    if not project.team.members.filter(id=request.user.id).exists():
+    if not project.user_is_member:
         return JsonResponse({
             'success': False,
             'error': 'У вас нет прав на удаление этого проекта'
@@ -136,7 +171,7 @@ def delete_project(request, pk):
     
     try:
         project_title = project.title
-        team_id = project.team.id
+        team_id = project.team_id
         content_folder = project.content_folder
         
         # Используем новую систему очистки файлов
@@ -166,67 +201,65 @@ def delete_project(request, pk):
 @login_required
 def download_project_data(request, pk):
     """Скачивание архива с данными проекта"""
-    project = get_object_or_404(Project, pk=pk)
+    project = get_project_with_membership(pk, request.user)
     
     # Проверяем доступ
-    if not project.team.members.filter(id=request.user.id).exists():
+    if not project.user_is_member:
         raise PermissionDenied("У вас нет доступа к этому проекту")
     
-    try:
-        # Создаем временный архив в памяти
-        zip_buffer = BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Добавляем информацию о проекте
-            project_info = {
-                'title': project.title,
-                'description': project.description,
-                'team': project.team.name,
-                'project_type': project.get_project_type_display(),
-                'age_rating': project.get_age_rating_display(),
-                'status': project.get_status_display(),
-                'created_at': project.created_at.isoformat(),
-                'content_folder': project.content_folder,
-            }
-            
-            # Добавляем информацию о главах
-            chapters_data = []
-            for chapter in project.chapters.all():
-                chapter_info = {
-                    'title': chapter.title,
-                    'status': chapter.get_status_display(),
-                    'assignee': chapter.assignee.username if chapter.assignee else None,
-                    'created_at': chapter.created_at.isoformat(),
-                }
-                chapters_data.append(chapter_info)
-            
-            project_info['chapters'] = chapters_data
-            
-            # Сохраняем JSON с информацией о проекте
-            zip_file.writestr('project_info.json', json.dumps(project_info, ensure_ascii=False, indent=2))
-            
-            # Добавляем файлы контента если папка существует
-            if project.content_folder:
-                from django.conf import settings
-                content_path = os.path.join(settings.BASE_DIR, 'content', 'projects', str(project.team.id), project.content_folder)
-                
-                if os.path.exists(content_path):
-                    for root, dirs, files in os.walk(content_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            # Получаем относительный путь для архива
-                            arcname = os.path.relpath(file_path, content_path)
-                            zip_file.write(file_path, f'content/{arcname}')
-        
-        zip_buffer.seek(0)
-        
-        # Создаем HTTP ответ с архивом
-        response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
-        filename = f"project_{project.id}_{project.title.replace(' ', '_')}.zip"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
-        
-    except Exception as e:
-        messages.error(request, f'Ошибка при создании архива: {str(e)}')
-        return redirect('projects:edit_project', pk=pk)
\ No newline at end of file
+    # Папка контента проверяется до начала ответа: архив отдается потоком,
+    # и ошибки, возникшие при его записи, здесь уже не перехватить
+    content_path = None
+    if project.content_folder:
+        from django.conf import settings
+        content_path = os.path.join(settings.BASE_DIR, 'content', 'projects', str(project.team.id), project.content_folder)
+        try:
+            with os.scandir(content_path):
+                pass
+        except FileNotFoundError:
+            # Файлов контента еще нет - в архив попадет только описание проекта
+            content_path = None
+        except OSError as e:
+            messages.error(request, f'Ошибка при создании архива: {str(e)}')
+            return redirect('projects:edit_project', pk=pk)
+    
+    # Добавляем информацию о проекте
+    project_info = {
+        'title': project.title,
+        'description': project.description,
+        'team': project.team.name,
+        'project_type': project.get_project_type_display(),
+        'age_rating': project.get_age_rating_display(),
+        'status': project.get_status_display(),
+        'created_at': project.created_at.isoformat(),
+        'content_folder': project.content_folder,
+    }
+    
+    # Добавляем информацию о главах.
+    # Главы читаются кортежами через values_list(): ответственный берется одним JOIN,
+    # модели Chapter/User не создаются, iterator() читает строки пачками.
+    # Генератор потребляется при записи архива - список глав не копится в памяти
+    status_labels = Chapter.STATUS_CHOICES_MAP
+    rows = project.chapters.values_list(
+        'title', 'status', 'assignee__username', 'created_at'
+    ).iterator(chunk_size=1000)
+    chapters_data = (
+        {
+            'title': title,
+            'status': status_labels.get(status, status),
+            'assignee': assignee,
+            'created_at': created_at.isoformat(),
+        }
+        for title, status, assignee, created_at in rows
+    )
+    project_manifest = iter_project_manifest(project_info, chapters_data)
+    
+    # Архив собирается и отдается по частям, без буферизации в памяти
+    response = StreamingHttpResponse(
+        stream_project_archive(project_manifest, content_path),
+        content_type='application/zip'
+    )
+    filename = f"project_{project.id}_{project.title.replace(' ', '_')}.zip"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    
+    return response
\ No newline at end of file
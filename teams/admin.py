@@ -2,17 +2,117 @@
 
 from django.contrib import admin
 from django.contrib import messages
-from django.db import models
+from django.contrib.auth.models import Permission
+from django.db import models, transaction
+from django.db.models import Prefetch
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
 from django.urls import path, reverse
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import ngettext
+import logging
 
 # Импортируются все модели из файла models.py этого приложения.
-from .models import Role, Team, TeamMembership, TeamStatusHistory, TeamStatus
-from .utils import deactivate_team, reactivate_team, disband_team
+from .models import Role, Team, TeamMembership, TeamStatusHistory, TeamStatus, TeamStatusChangeType
+from .utils import bulk_change_team_status
+
+logger = logging.getLogger(__name__)
+
+
+def is_changelist_request(request, model):
+    """
+    Проверяет, что запрос относится к списку объектов модели в админке
+    
+    Массовые действия отправляются на тот же URL, поэтому тоже считаются
+    запросами списка. Для остальных страниц (форма редактирования,
+    подтверждение удаления) queryset должен загружать все поля.
+    """
+    match = request.resolver_match
+    opts = model._meta
+    return match is not None and match.url_name == f'{opts.app_label}_{opts.model_name}_changelist'
+
+
+# Цвета и иконки статусов команды в списке команд
+TEAM_STATUS_COLORS = {
+    TeamStatus.ACTIVE: '#28a745',    # Bootstrap success green
+    TeamStatus.INACTIVE: '#ffc107',  # Bootstrap warning yellow
+    TeamStatus.DISBANDED: '#dc3545'  # Bootstrap danger red
+}
+TEAM_STATUS_ICONS = {
+    TeamStatus.ACTIVE: '✓',
+    TeamStatus.INACTIVE: '⏸',
+    TeamStatus.DISBANDED: '✗'
+}
+
+
+def render_team_status(color, icon, status_text):
+    """Формирует HTML статуса (или типа изменения статуса) команды с цветовой индикацией"""
+    return format_html(
+        '<span style="color: {}; font-weight: bold;">{} {}</span>',
+        color,
+        icon,
+        status_text
+    )
+
+
+# HTML зависит только от статуса, поэтому строится один раз для каждого статуса
+TEAM_STATUS_HTML = {
+    status: render_team_status(TEAM_STATUS_COLORS[status], TEAM_STATUS_ICONS[status], status_text)
+    for status, status_text in TeamStatus.choices
+}
+
+
+# Цвет и иконка бейджа стандартных ролей участника: (цвет, иконка)
+ROLE_BADGE_STYLES = {
+    "Руководитель": ("#dc3545", "👑"),  # Красный для руководителя
+    "Редактор": ("#007cba", "✏️"),      # Синий для редактора
+    "Переводчик": ("#17a2b8", "🌐"),    # Бирюзовый для переводчика
+    "Клинер": ("#28a745", "🧹"),        # Зеленый для клинера
+    "Тайпер": ("#ffc107", "⌨️"),        # Желтый для тайпера
+}
+DEFAULT_ROLE_BADGE_STYLE = ("#6f42c1", "⭐")  # Фиолетовый для других стандартных ролей
+CUSTOM_ROLE_BADGE_STYLE = ("#6c757d", "🔧")   # Серый для кастомных ролей
+
+
+# Цвета и иконки типов изменений в истории статусов команд
+CHANGE_TYPE_COLORS = {
+    TeamStatusChangeType.CREATED: '#28a745',
+    TeamStatusChangeType.DEACTIVATED: '#ffc107',
+    TeamStatusChangeType.REACTIVATED: '#17a2b8',
+    TeamStatusChangeType.DISBANDED: '#dc3545'
+}
+CHANGE_TYPE_ICONS = {
+    TeamStatusChangeType.CREATED: '➕',
+    TeamStatusChangeType.DEACTIVATED: '⏸',
+    TeamStatusChangeType.REACTIVATED: '▶️',
+    TeamStatusChangeType.DISBANDED: '❌'
+}
+
+# HTML типа изменения строится один раз для каждого значения
+CHANGE_TYPE_HTML = {
+    change_type: render_team_status(CHANGE_TYPE_COLORS[change_type], CHANGE_TYPE_ICONS[change_type], label)
+    for change_type, label in TeamStatusChangeType.choices
+}
+
+# HTML перехода статуса для всех пар (старый статус или None, новый статус)
+STATUS_CHANGE_HTML = {
+    (None, new_status): format_html(
+        '<span style="color: #007cba; font-weight: bold;">{}</span>',
+        new_label
+    )
+    for new_status, new_label in TeamStatus.choices
+}
+STATUS_CHANGE_HTML.update({
+    (old_status, new_status): format_html(
+        '<span style="color: #6c757d;">{}</span> → <span style="color: #007cba; font-weight: bold;">{}</span>',
+        old_label,
+        new_label
+    )
+    for old_status, old_label in TeamStatus.choices
+    for new_status, new_label in TeamStatus.choices
+})
+
 
 # Расширенная регистрация модели Role с кастомным админом
 @admin.register(Role)
@@ -51,14 +151,15 @@ class RoleAdmin(admin.ModelAdmin):
     
     def description_short(self, obj):
         """Сокращенное описание роли для списка"""
-        if obj.description:
-            return obj.description[:50] + '...' if len(obj.description) > 50 else obj.description
-        return '-'
+        description = obj.description
+        if len(description) > 50:
+            return description[:50] + '...'
+        return description or '-'
     description_short.short_description = _("Описание")
     
     def permission_count(self, obj):
         """Отображение количества разрешений у роли"""
-        count = obj.get_permission_count()
+        count = obj.permission_total
         if count == 0:
             return format_html('<span style="color: #dc3545;">0 разрешений</span>')
         elif count <= 3:
@@ -66,11 +167,11 @@ class RoleAdmin(admin.ModelAdmin):
         else:
             return format_html('<span style="color: #28a745;">{} разрешений</span>', count)
     permission_count.short_description = _("Разрешения")
-    permission_count.admin_order_field = 'permissions__count'
+    permission_count.admin_order_field = 'permission_total'
     
     def usage_count(self, obj):
         """Отображение количества использований роли"""
-        count = obj.get_usage_count()
+        count = obj.usage_total
         if count == 0:
             return format_html('<span style="color: #6c757d;">Не используется</span>')
         else:
@@ -83,6 +184,7 @@ class RoleAdmin(admin.ModelAdmin):
                 ) % {'count': count}
             )
     usage_count.short_description = _("Использование")
+    usage_count.admin_order_field = 'usage_total'
     
     def usage_count_display(self, obj):
         """Детальное отображение использования роли для формы редактирования"""
@@ -90,27 +192,37 @@ class RoleAdmin(admin.ModelAdmin):
         if count == 0:
             return "Роль не назначена ни одному участнику"
         
-        # Получаем список команд, где используется роль
-        from django.db.models import Count
+        # Получаем список команд, где используется роль: первые 5 команд и
+        # шестая как признак того, что команд больше
         teams_with_role = Team.objects.filter(
             teammembership__roles=obj
         ).annotate(
-            member_count=Count('teammembership__roles', filter=models.Q(teammembership__roles=obj))
+            member_count=models.Count('teammembership__roles', filter=models.Q(teammembership__roles=obj))
         ).distinct()
+        teams = list(teams_with_role[:6])
+        
+        # Общее число команд нужно отдельным запросом, только если их больше 5
+        if len(teams) > 5:
+            team_count = Team.objects.filter(teammembership__roles=obj).values('pk').distinct().count()
+        else:
+            team_count = len(teams)
         
-        result = f"Роль назначена {count} участникам в {teams_with_role.count()} командах:\n"
-        for team in teams_with_role[:5]:  # Показываем первые 5 команд
+        result = f"Роль назначена {count} участникам в {team_count} командах:\n"
+        for team in teams[:5]:  # Показываем первые 5 команд
             result += f"• {team.name} ({team.member_count} участников)\n"
         
-        if teams_with_role.count() > 5:
-            result += f"... и еще {teams_with_role.count() - 5} команд"
+        if team_count > 5:
+            result += f"... и еще {team_count - 5} команд"
             
         return result
     usage_count_display.short_description = _("Детали использования")
     
     def get_queryset(self, request):
-        """Оптимизируем запросы для списка ролей"""
-        return super().get_queryset(request).prefetch_related('permissions')
+        """Подсчитываем разрешения и использования в том же запросе, что и список ролей"""
+        return super().get_queryset(request).annotate(
+            permission_total=models.Count('permissions', distinct=True),
+            usage_total=models.Count('teammembership', distinct=True),
+        )
     
     def has_delete_permission(self, request, obj=None):
         """Запрещаем удаление стандартных ролей"""
@@ -170,6 +282,8 @@ class TeamAdmin(admin.ModelAdmin):
     # Определяет, какие поля модели Team будут отображаться в виде колонок
     # в общем списке команд.
     list_display = ("name", "creator", "status_display", "member_count", "created_at", "delete_team_button")
+    # Создатель выводится в списке - загружаем его тем же запросом.
+    list_select_related = ("creator",)
     # Добавляет поле поиска, которое будет искать по названию команды.
     search_fields = ("name", "creator__username")
     # Добавляем фильтры по статусу и дате создания
@@ -185,6 +299,27 @@ class TeamAdmin(admin.ModelAdmin):
         "disband_selected_teams"
     ]
 
+    class Media:
+        css = {
+            "all": ("admin/css/team_delete_button.css",)
+        }
+
+    # Действия, доступные только суперпользователю
+    superuser_actions = (
+        "delete_selected_teams_with_confirmation",
+        "deactivate_selected_teams",
+        "reactivate_selected_teams",
+        "disband_selected_teams",
+    )
+
+    def get_actions(self, request):
+        """Скрываем действия суперпользователя от остальных администраторов"""
+        actions = super().get_actions(request)
+        if not request.user.is_superuser:
+            for name in self.superuser_actions:
+                actions.pop(name, None)
+        return actions
+
     def get_urls(self):
         """Добавляем кастомные URL для подтверждения удаления"""
         urls = super().get_urls()
@@ -199,33 +334,33 @@ class TeamAdmin(admin.ModelAdmin):
 
     def status_display(self, obj):
         """Отображение статуса команды с цветовой индикацией"""
-        status_colors = {
-            TeamStatus.ACTIVE: '#28a745',    # Bootstrap success green
-            TeamStatus.INACTIVE: '#ffc107',  # Bootstrap warning yellow
-            TeamStatus.DISBANDED: '#dc3545'  # Bootstrap danger red
-        }
-        status_icons = {
-            TeamStatus.ACTIVE: '✓',
-            TeamStatus.INACTIVE: '⏸',
-            TeamStatus.DISBANDED: '✗'
-        }
-        
-        color = status_colors.get(obj.status, '#6c757d')
-        icon = status_icons.get(obj.status, '?')
-        
-        return format_html(
-            '<span style="color: {}; font-weight: bold;">{} {}</span>',
-            color,
-            icon,
-            obj.get_status_display()
-        )
+        status_html = TEAM_STATUS_HTML.get(obj.status)
+        if status_html is None:
+            # Статус вне TeamStatus (например, устаревшее значение в БД)
+            status_html = render_team_status('#6c757d', '?', obj.get_status_display())
+        return status_html
     status_display.short_description = _("Статус")
     status_display.admin_order_field = 'status'
 
+    def get_queryset(self, request):
+        """Подсчитываем участников в том же запросе, что и список команд"""
+        queryset = super().get_queryset(request).annotate(
+            member_total=models.Count('teammembership', distinct=True),
+            active_member_total=models.Count(
+                'teammembership',
+                filter=models.Q(teammembership__is_active=True),
+                distinct=True
+            ),
+        )
+        if is_changelist_request(request, self.model):
+            # Списку и массовым действиям нужны только выводимые поля
+            queryset = queryset.only('name', 'status', 'created_at', 'creator__username')
+        return queryset
+
     def member_count(self, obj):
         """Показывает количество участников в команде"""
-        count = obj.members.count()
-        active_count = obj.members.filter(teammembership__is_active=True).count()
+        count = obj.member_total
+        active_count = obj.active_member_total
         
         if obj.status == TeamStatus.ACTIVE:
             return ngettext(
@@ -245,24 +380,14 @@ class TeamAdmin(admin.ModelAdmin):
             )
 
     member_count.short_description = _("Участники")
+    member_count.admin_order_field = 'member_total'
 
     def delete_team_button(self, obj):
         """Добавляет кнопку удаления с подтверждением для каждой команды"""
         url = reverse("admin:teams_team_delete_confirm", args=[obj.pk])
+        # Стили кнопки подключаются один раз через Media, а не в каждой строке
         return format_html(
-            '<a class="button delete-team-btn" href="{}" '
-            'style="background-color: #dc3545; color: white; '
-            'padding: 5px 10px; text-decoration: none; border-radius: 3px; font-size: 12px; '
-            'border: 1px solid #dc3545; display: inline-block;">'
-            '{}</a>'
-            '<style>'
-            '.delete-team-btn:hover {{ '
-            'background-color: #c82333 !important; '
-            'border-color: #bd2130 !important; '
-            'color: white !important; '
-            'text-decoration: none !important; '
-            '}}'
-            '</style>',
+            '<a class="button delete-team-btn" href="{}">{}</a>',
             url,
             _("Удалить"),
         )
@@ -272,19 +397,20 @@ class TeamAdmin(admin.ModelAdmin):
 
     def deactivate_selected_teams(self, request, queryset):
         """Массовая приостановка команд"""
-        if not request.user.is_superuser:
-            self.message_user(request, _("Недостаточно прав для выполнения этого действия"), level=messages.ERROR)
+        # Статус меняется для всех команд сразу, а не вызовом deactivate_team() для каждой
+        try:
+            count = bulk_change_team_status(
+                queryset, request.user, TeamStatusChangeType.DEACTIVATED, "Массовая приостановка через админку"
+            )
+        except Exception as e:
+            # Подробности с трассировкой - в журнале, пользователю только текст ошибки
+            logger.exception("Массовое действие %s над командами завершилось ошибкой", "deactivate")
+            self.message_user(
+                request, 
+                _("Ошибка при приостановке: ") + str(e), 
+                level=messages.ERROR
+            )
             return
-            
-        count = 0
-        errors = []
-        
-        for team in queryset.filter(status=TeamStatus.ACTIVE):
-            try:
-                deactivate_team(team, request.user, "Массовая приостановка через админку")
-                count += 1
-            except Exception as e:
-                errors.append(f"{team.name}: {str(e)}")
         
         if count > 0:
             self.message_user(
@@ -295,31 +421,25 @@ class TeamAdmin(admin.ModelAdmin):
                     count
                 ) % {'count': count}
             )
-        
-        if errors:
-            self.message_user(
-                request, 
-                _("Ошибки при приостановке: ") + "; ".join(errors), 
-                level=messages.WARNING
-            )
     
     deactivate_selected_teams.short_description = _("Приостановить выбранные команды")
 
     def reactivate_selected_teams(self, request, queryset):
         """Массовое возобновление команд"""
-        if not request.user.is_superuser:
-            self.message_user(request, _("Недостаточно прав для выполнения этого действия"), level=messages.ERROR)
+        # Статус меняется для всех команд сразу, а не вызовом reactivate_team() для каждой
+        try:
+            count = bulk_change_team_status(
+                queryset, request.user, TeamStatusChangeType.REACTIVATED, "Массовое возобновление через админку"
+            )
+        except Exception as e:
+            # Подробности с трассировкой - в журнале, пользователю только текст ошибки
+            logger.exception("Массовое действие %s над командами завершилось ошибкой", "reactivate")
+            self.message_user(
+                request, 
+                _("Ошибка при возобновлении: ") + str(e), 
+                level=messages.ERROR
+            )
             return
-            
-        count = 0
-        errors = []
-        
-        for team in queryset.filter(status=TeamStatus.INACTIVE):
-            try:
-                reactivate_team(team, request.user, "Массовое возобновление через админку")
-                count += 1
-            except Exception as e:
-                errors.append(f"{team.name}: {str(e)}")
         
         if count > 0:
             self.message_user(
@@ -330,31 +450,25 @@ class TeamAdmin(admin.ModelAdmin):
                     count
                 ) % {'count': count}
             )
-        
-        if errors:
-            self.message_user(
-                request, 
-                _("Ошибки при возобновлении: ") + "; ".join(errors), 
-                level=messages.WARNING
-            )
     
     reactivate_selected_teams.short_description = _("Возобновить выбранные команды")
 
     def disband_selected_teams(self, request, queryset):
         """Массовый роспуск команд"""
-        if not request.user.is_superuser:
-            self.message_user(request, _("Недостаточно прав для выполнения этого действия"), level=messages.ERROR)
+        # Статус меняется для всех команд сразу, а не вызовом disband_team() для каждой
+        try:
+            count = bulk_change_team_status(
+                queryset, request.user, TeamStatusChangeType.DISBANDED, "Массовый роспуск через админку"
+            )
+        except Exception as e:
+            # Подробности с трассировкой - в журнале, пользователю только текст ошибки
+            logger.exception("Массовое действие %s над командами завершилось ошибкой", "disband")
+            self.message_user(
+                request, 
+                _("Ошибка при роспуске: ") + str(e), 
+                level=messages.ERROR
+            )
             return
-            
-        count = 0
-        errors = []
-        
-        for team in queryset.exclude(status=TeamStatus.DISBANDED):
-            try:
-                disband_team(team, request.user, "Массовый роспуск через админку")
-                count += 1
-            except Exception as e:
-                errors.append(f"{team.name}: {str(e)}")
         
         if count > 0:
             self.message_user(
@@ -365,20 +479,14 @@ class TeamAdmin(admin.ModelAdmin):
                     count
                 ) % {'count': count}
             )
-        
-        if errors:
-            self.message_user(
-                request, 
-                _("Ошибки при роспуске: ") + "; ".join(errors), 
-                level=messages.WARNING
-            )
     
     disband_selected_teams.short_description = _("Распустить выбранные команды")
 
     def delete_team_confirm_view(self, request, team_id):
         """Страница подтверждения удаления команды"""
+        # Команда загружается с создателем и аннотированными счетчиками участников
         try:
-            team = Team.objects.get(pk=team_id)
+            team = self.get_queryset(request).select_related('creator').get(pk=team_id)
         except Team.DoesNotExist:
             messages.error(request, _("Команда с ID %(team_id)s не найдена.") % {'team_id': team_id})
             return HttpResponseRedirect(reverse("admin:teams_team_changelist"))
@@ -388,7 +496,7 @@ class TeamAdmin(admin.ModelAdmin):
                 # Получаем информацию о команде для логирования
                 team_name = team.name
                 creator_name = team.creator.username
-                member_count = team.members.count()
+                member_count = team.member_total
 
                 # Удаляем команду
                 team.delete()
@@ -411,8 +519,8 @@ class TeamAdmin(admin.ModelAdmin):
         # Получаем дополнительную информацию о команде для отображения
         context = {
             "team": team,
-            "member_count": team.members.count(),
-            "active_member_count": team.members.filter(teammembership__is_active=True).count(),
+            "member_count": team.member_total,
+            "active_member_count": team.active_member_total,
             "memberships": TeamMembership.objects.filter(team=team)
             .select_related("user")
             .prefetch_related("roles"),
@@ -427,10 +535,12 @@ class TeamAdmin(admin.ModelAdmin):
     def delete_selected_teams_with_confirmation(self, request, queryset):
         """Массовое удаление команд с подтверждением"""
         if request.POST.get("post"):
-            # Подтверждение получено, удаляем команды
-            count = queryset.count()
-            team_names = list(queryset.values_list("name", flat=True))
-            queryset.delete()
+            # Подтверждение получено, удаляем команды. Выбранные команды читаются
+            # одним запросом, количество и названия берутся из него
+            teams = list(queryset.values_list("pk", "name"))
+            count = len(teams)
+            team_names = [name for _, name in teams]
+            Team.objects.filter(pk__in=[pk for pk, _ in teams]).delete()
 
             messages.success(
                 request,
@@ -445,11 +555,13 @@ class TeamAdmin(admin.ModelAdmin):
             )
             return HttpResponseRedirect(request.get_full_path())
 
-        # Показываем страницу подтверждения
+        # Показываем страницу подтверждения. Команды загружаются один раз,
+        # счетчики участников уже аннотированы в get_queryset
+        teams = list(queryset)
         context = {
-            "teams": queryset,
-            "team_count": queryset.count(),
-            "total_members": sum(team.members.count() for team in queryset),
+            "teams": teams,
+            "team_count": len(teams),
+            "total_members": sum(team.member_total for team in teams),
             "title": _("Подтверждение удаления команд"),
             "opts": self.model._meta,
             "action_checkbox_name": admin.ACTION_CHECKBOX_NAME,
@@ -476,6 +588,8 @@ class TeamMembershipAdmin(admin.ModelAdmin):
     
     # Определяет колонки в общем списке всех "членств в командах".
     list_display = ("user", "team", "roles_display", "permission_count_display", "is_active_display", "joined_at")
+    # Пользователь и команда выводятся в списке - загружаем их тем же запросом.
+    list_select_related = ("user", "team")
     # Добавляет боковую панель для фильтрации по команде, активности и ролям.
     list_filter = ("team", "is_active", "joined_at", "roles", "team__status")
     # Включает виджет с поиском для полей 'user' и 'team'.
@@ -519,47 +633,31 @@ class TeamMembershipAdmin(admin.ModelAdmin):
         if not roles:
             return format_html('<span style="color: #6c757d; font-style: italic;">Роли не назначены</span>')
         
-        role_badges = []
-        for role in roles:
-            # Разные цвета для разных типов ролей
-            if role.name == "Руководитель":
-                color = "#dc3545"  # Красный для руководителя
-                icon = "👑"
-            elif role.name == "Редактор":
-                color = "#007cba"  # Синий для редактора
-                icon = "✏️"
-            elif role.name == "Переводчик":
-                color = "#17a2b8"  # Бирюзовый для переводчика
-                icon = "🌐"
-            elif role.name == "Клинер":
-                color = "#28a745"  # Зеленый для клинера
-                icon = "🧹"
-            elif role.name == "Тайпер":
-                color = "#ffc107"  # Желтый для тайпера
-                icon = "⌨️"
-            elif role.is_default:
-                color = "#6f42c1"  # Фиолетовый для других стандартных ролей
-                icon = "⭐"
-            else:
-                color = "#6c757d"  # Серый для кастомных ролей
-                icon = "🔧"
-                
-            role_badges.append(
-                f'<span style="background-color: {color}; color: white; '
-                f'padding: 3px 8px; border-radius: 12px; font-size: 11px; '
-                f'margin-right: 4px; margin-bottom: 2px; display: inline-block; '
-                f'font-weight: 500; box-shadow: 0 1px 2px rgba(0,0,0,0.1);">'
-                f'{icon} {role.name}</span>'
+        return format_html_join(
+            '',
+            '<span style="background-color: {}; color: white; '
+            'padding: 3px 8px; border-radius: 12px; font-size: 11px; '
+            'margin-right: 4px; margin-bottom: 2px; display: inline-block; '
+            'font-weight: 500; box-shadow: 0 1px 2px rgba(0,0,0,0.1);">'
+            '{} {}</span>',
+            (
+                ROLE_BADGE_STYLES.get(
+                    role.name,
+                    DEFAULT_ROLE_BADGE_STYLE if role.is_default else CUSTOM_ROLE_BADGE_STYLE
+                ) + (role.name,)
+                for role in roles
             )
-        
-        return format_html(''.join(role_badges))
+        )
     roles_display.short_description = _("Роли")
 
     def permission_count_display(self, obj):
         """Отображение количества эффективных разрешений"""
-        permissions = set()
-        for role in obj.roles.all():
-            permissions.update(role.get_permission_names())
+        # Роли и их разрешения предзагружены в get_queryset
+        permissions = {
+            permission.codename
+            for role in obj.roles.all()
+            for permission in role.permissions.all()
+        }
         
         count = len(permissions)
         if count == 0:
@@ -578,8 +676,10 @@ class TeamMembershipAdmin(admin.ModelAdmin):
         permissions = set()
         role_permissions = {}
         
+        # Роли и их разрешения предзагружены в get_queryset (форма получает
+        # объект через него), поэтому запросов на каждую роль нет
         for role in obj.roles.all():
-            role_perms = role.get_permission_names()
+            role_perms = [permission.codename for permission in role.permissions.all()]
             role_permissions[role.name] = role_perms
             permissions.update(role_perms)
         
@@ -611,171 +711,98 @@ class TeamMembershipAdmin(admin.ModelAdmin):
     is_active_display.admin_order_field = 'is_active'
     
     # Массовые действия для назначения конкретных ролей
-    def assign_leader_role(self, request, queryset):
-        """Массовое назначение роли Руководитель"""
+    def _assign_role(self, request, queryset, role_name):
+        """
+        Массово назначает роль выбранным участникам
+        
+        Участники, у которых роли еще нет, выбираются одним запросом, а связи
+        создаются одним bulk_create в промежуточную таблицу вместо add_role()
+        для каждого участника. Назначение каждому участнику логируется,
+        как и в add_role().
+        """
         from .audit_logger import RoleAuditLogger
         
         try:
-            leader_role = Role.objects.get(name="Руководитель")
-            count = 0
-            for membership in queryset:
-                if leader_role not in membership.roles.all():
-                    membership.add_role(leader_role, request.user)
-                    count += 1
-            
-            if count > 0:
-                RoleAuditLogger.log_bulk_role_assignment(
-                    admin_user=request.user,
-                    role_name="Руководитель",
-                    user_count=count
-                )
-            
-            self.message_user(
-                request,
-                ngettext(
-                    "Роль 'Руководитель' назначена %(count)d участнику",
-                    "Роль 'Руководитель' назначена %(count)d участникам",
-                    count
-                ) % {'count': count}
-            )
+            role = Role.objects.get(name=role_name)
         except Role.DoesNotExist:
-            self.message_user(request, "Роль 'Руководитель' не найдена в системе", level=messages.ERROR)
+            self.message_user(request, f"Роль '{role_name}' не найдена в системе", level=messages.ERROR)
+            return
+        
+        memberships = list(
+            queryset.exclude(roles=role)
+            .select_related('user', 'team')
+            .prefetch_related(None)
+        )
+        through = TeamMembership.roles.through
+        with transaction.atomic():
+            through.objects.bulk_create(
+                [through(teammembership_id=membership.pk, role_id=role.pk) for membership in memberships],
+                batch_size=1000,
+                ignore_conflicts=True
+            )
+        
+        for membership in memberships:
+            RoleAuditLogger.log_role_assigned_to_user(
+                admin_user=request.user,
+                target_user=membership.user,
+                role_name=role.name,
+                team_name=membership.team.name
+            )
+        
+        count = len(memberships)
+        if count > 0:
+            RoleAuditLogger.log_bulk_role_assignment(
+                admin_user=request.user,
+                role_name=role.name,
+                user_count=count
+            )
+        
+        self.message_user(
+            request,
+            ngettext(
+                "Роль '%(role)s' назначена %(count)d участнику",
+                "Роль '%(role)s' назначена %(count)d участникам",
+                count
+            ) % {'role': role.name, 'count': count}
+        )
+    
+    def assign_leader_role(self, request, queryset):
+        """Массовое назначение роли Руководитель"""
+        self._assign_role(request, queryset, "Руководитель")
     assign_leader_role.short_description = _("Назначить роль 'Руководитель'")
     
     def assign_editor_role(self, request, queryset):
         """Массовое назначение роли Редактор"""
-        from .audit_logger import RoleAuditLogger
-        
-        try:
-            editor_role = Role.objects.get(name="Редактор")
-            count = 0
-            for membership in queryset:
-                if editor_role not in membership.roles.all():
-                    membership.add_role(editor_role, request.user)
-                    count += 1
-            
-            if count > 0:
-                RoleAuditLogger.log_bulk_role_assignment(
-                    admin_user=request.user,
-                    role_name="Редактор",
-                    user_count=count
-                )
-            
-            self.message_user(
-                request,
-                ngettext(
-                    "Роль 'Редактор' назначена %(count)d участнику",
-                    "Роль 'Редактор' назначена %(count)d участникам",
-                    count
-                ) % {'count': count}
-            )
-        except Role.DoesNotExist:
-            self.message_user(request, "Роль 'Редактор' не найдена в системе", level=messages.ERROR)
+        self._assign_role(request, queryset, "Редактор")
     assign_editor_role.short_description = _("Назначить роль 'Редактор'")
     
     def assign_translator_role(self, request, queryset):
         """Массовое назначение роли Переводчик"""
-        from .audit_logger import RoleAuditLogger
-        
-        try:
-            translator_role = Role.objects.get(name="Переводчик")
-            count = 0
-            for membership in queryset:
-                if translator_role not in membership.roles.all():
-                    membership.add_role(translator_role, request.user)
-                    count += 1
-            
-            if count > 0:
-                RoleAuditLogger.log_bulk_role_assignment(
-                    admin_user=request.user,
-                    role_name="Переводчик",
-                    user_count=count
-                )
-            
-            self.message_user(
-                request,
-                ngettext(
-                    "Роль 'Переводчик' назначена %(count)d участнику",
-                    "Роль 'Переводчик' назначена %(count)d участникам",
-                    count
-                ) % {'count': count}
-            )
-        except Role.DoesNotExist:
-            self.message_user(request, "Роль 'Переводчик' не найдена в системе", level=messages.ERROR)
+        self._assign_role(request, queryset, "Переводчик")
     assign_translator_role.short_description = _("Назначить роль 'Переводчик'")
     
     def assign_cleaner_role(self, request, queryset):
         """Массовое назначение роли Клинер"""
-        from .audit_logger import RoleAuditLogger
-        
-        try:
-            cleaner_role = Role.objects.get(name="Клинер")
-            count = 0
-            for membership in queryset:
-                if cleaner_role not in membership.roles.all():
-                    membership.add_role(cleaner_role, request.user)
-                    count += 1
-            
-            if count > 0:
-                RoleAuditLogger.log_bulk_role_assignment(
-                    admin_user=request.user,
-                    role_name="Клинер",
-                    user_count=count
-                )
-            
-            self.message_user(
-                request,
-                ngettext(
-                    "Роль 'Клинер' назначена %(count)d участнику",
-                    "Роль 'Клинер' назначена %(count)d участникам",
-                    count
-                ) % {'count': count}
-            )
-        except Role.DoesNotExist:
-            self.message_user(request, "Роль 'Клинер' не найдена в системе", level=messages.ERROR)
+        self._assign_role(request, queryset, "Клинер")
     assign_cleaner_role.short_description = _("Назначить роль 'Клинер'")
     
     def assign_typesetter_role(self, request, queryset):
         """Массовое назначение роли Тайпер"""
-        from .audit_logger import RoleAuditLogger
-        
-        try:
-            typesetter_role = Role.objects.get(name="Тайпер")
-            count = 0
-            for membership in queryset:
-                if typesetter_role not in membership.roles.all():
-                    membership.add_role(typesetter_role, request.user)
-                    count += 1
-            
-            if count > 0:
-                RoleAuditLogger.log_bulk_role_assignment(
-                    admin_user=request.user,
-                    role_name="Тайпер",
-                    user_count=count
-                )
-            
-            self.message_user(
-                request,
-                ngettext(
-                    "Роль 'Тайпер' назначена %(count)d участнику",
-                    "Роль 'Тайпер' назначена %(count)d участникам",
-                    count
-                ) % {'count': count}
-            )
-        except Role.DoesNotExist:
-            self.message_user(request, "Роль 'Тайпер' не найдена в системе", level=messages.ERROR)
+        self._assign_role(request, queryset, "Тайпер")
     assign_typesetter_role.short_description = _("Назначить роль 'Тайпер'")
     
     def remove_all_roles(self, request, queryset):
         """Массовое удаление всех ролей у участников"""
         from .audit_logger import RoleAuditLogger
         
-        count = 0
-        for membership in queryset:
-            roles_count = membership.roles.count()
-            if roles_count > 0:
-                membership.roles.clear()
-                count += 1
+        # Связи удаляются одним DELETE из промежуточной таблицы вместо
+        # roles.count() и roles.clear() для каждого участника
+        through = TeamMembership.roles.through
+        membership_ids = list(queryset.values_list('pk', flat=True))
+        links = through.objects.filter(teammembership_id__in=membership_ids)
+        with transaction.atomic():
+            count = links.values('teammembership_id').distinct().count()
+            links.delete()
         
         if count > 0:
             RoleAuditLogger.log_bulk_role_removal(
@@ -821,15 +848,35 @@ class TeamMembershipAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         """Оптимизируем запросы для списка участников"""
-        return super().get_queryset(request).select_related('user', 'team').prefetch_related('roles', 'roles__permissions')
+        # Роли нужны в списке (roles_display, permission_count_display) и в форме
+        # (effective_permissions_display): из них читаются только имя, признак
+        # стандартной роли и коды разрешений
+        queryset = super().get_queryset(request).prefetch_related(
+            Prefetch('roles', queryset=Role.objects.only('id', 'name', 'is_default').prefetch_related(
+                Prefetch('permissions', queryset=Permission.objects.only('id', 'codename'))
+            ))
+        )
+        if is_changelist_request(request, self.model):
+            # Из пользователя и команды списку нужны только имена
+            # (is_superuser читает журнал аудита в массовых действиях)
+            queryset = queryset.only(
+                'is_active', 'joined_at',
+                'user__username', 'user__is_superuser',
+                'team__name',
+            )
+        return queryset
     
     def save_model(self, request, obj, form, change):
         """Дополнительная логика при сохранении участника команды"""
         super().save_model(request, obj, form, change)
         
-        # Логируем изменения ролей
-        roles_count = obj.roles.count()
-        permissions_count = len(set().union(*[role.get_permission_names() for role in obj.roles.all()]))
+        # Логируем изменения ролей: число ролей и уникальных разрешений одним запросом
+        counts = obj.roles.aggregate(
+            roles=models.Count('id', distinct=True),
+            permissions=models.Count('permissions', distinct=True),
+        )
+        roles_count = counts['roles']
+        permissions_count = counts['permissions']
         
         if change:
             messages.info(
@@ -864,33 +911,20 @@ class TeamStatusHistoryAdmin(admin.ModelAdmin):
     
     def change_type_display(self, obj):
         """Отображение типа изменения с иконкой"""
-        icons = {
-            'created': '➕',
-            'deactivated': '⏸',
-            'reactivated': '▶️',
-            'disbanded': '❌'
-        }
-        colors = {
-            'created': '#28a745',
-            'deactivated': '#ffc107', 
-            'reactivated': '#17a2b8',
-            'disbanded': '#dc3545'
-        }
-        
-        icon = icons.get(obj.change_type, '?')
-        color = colors.get(obj.change_type, '#6c757d')
-        
-        return format_html(
-            '<span style="color: {}; font-weight: bold;">{} {}</span>',
-            color,
-            icon,
-            obj.get_change_type_display()
-        )
+        change_type_html = CHANGE_TYPE_HTML.get(obj.change_type)
+        if change_type_html is None:
+            change_type_html = render_team_status('#6c757d', '?', obj.get_change_type_display())
+        return change_type_html
     change_type_display.short_description = _("Действие")
     change_type_display.admin_order_field = 'change_type'
     
     def status_change(self, obj):
         """Отображение изменения статуса"""
+        status_change_html = STATUS_CHANGE_HTML.get((obj.old_status or None, obj.new_status))
+        if status_change_html is not None:
+            return status_change_html
+        
+        # Статус вне TeamStatus (например, устаревшее значение в БД)
         if obj.old_status:
             return format_html(
                 '<span style="color: #6c757d;">{}</span> → <span style="color: #007cba; font-weight: bold;">{}</span>',
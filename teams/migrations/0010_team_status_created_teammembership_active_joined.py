@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-16 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0009_add_userrole_model'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='team',
+            name='teams_team_status_d66a03_idx',
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['status', 'created_at'], name='team_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='teammembership',
+            index=models.Index(fields=['is_active', '-joined_at'], name='teamm_active_joined'),
+        ),
+    ]
@@ -286,7 +286,9 @@ class Team(models.Model):
     
     class Meta:
         indexes = [
-            models.Index(fields=['status']),
+            # Фильтр по статусу и сортировка/фильтр по дате создания в списке команд;
+            # покрывает и запросы только по статусу
+            models.Index(fields=['status', 'created_at'], name='team_status_created'),
             models.Index(fields=['creator', 'status']),
         ]
     
@@ -332,6 +334,8 @@ class TeamMembership(models.Model):
         unique_together = ("user", "team")
         indexes = [
             models.Index(fields=['team', 'is_active']),
+            # Фильтр по активности с сортировкой по дате вступления (список участников в админке)
+            models.Index(fields=['is_active', '-joined_at'], name='teamm_active_joined'),
         ]
     
     def deactivate(self):
@@ -3,7 +3,9 @@
 """
 
 from django.db import transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import logging
 
 from .models import Team, TeamMembership, TeamStatusHistory, TeamStatus, TeamStatusChangeType
@@ -53,14 +55,14 @@ def deactivate_team(team, user, reason=""):
     
     logger.info(f"Команда {team.name} приостановлена пользователем {user.username}. Причина: {reason}")
     
-    # Отправляем уведомления участникам команды
+    # Ставим рассылку уведомлений участникам команды в фоновую очередь
     try:
-        from notifications.services import NotificationService
-        NotificationService.send_team_status_notification(
-            team=team,
-            change_type=TeamStatusChangeType.DEACTIVATED,
-            changed_by=user,
-            reason=reason
+        from notifications.tasks import send_team_status_notification_task
+        send_team_status_notification_task(
+            team.id,
+            TeamStatusChangeType.DEACTIVATED.value,
+            user.id,
+            reason
         )
     except Exception as e:
         logger.error(f"Ошибка при отправке уведомлений о приостановке команды {team.name}: {e}")
@@ -113,14 +115,14 @@ def reactivate_team(team, user, reason=""):
     logger.info(f"Команда {team.name} возобновлена пользователем {user.username}. "
                 f"Реактивировано участников: {reactivated_count}. Причина: {reason}")
     
-    # Отправляем уведомления участникам команды
+    # Ставим рассылку уведомлений участникам команды в фоновую очередь
     try:
-        from notifications.services import NotificationService
-        NotificationService.send_team_status_notification(
-            team=team,
-            change_type=TeamStatusChangeType.REACTIVATED,
-            changed_by=user,
-            reason=reason
+        from notifications.tasks import send_team_status_notification_task
+        send_team_status_notification_task(
+            team.id,
+            TeamStatusChangeType.REACTIVATED.value,
+            user.id,
+            reason
         )
     except Exception as e:
         logger.error(f"Ошибка при отправке уведомлений о возобновлении команды {team.name}: {e}")
@@ -173,14 +175,14 @@ def disband_team(team, user, reason=""):
     logger.info(f"Команда {team.name} распущена пользователем {user.username}. "
                 f"Деактивировано участников: {deactivated_count}. Причина: {reason}")
     
-    # Отправляем уведомления участникам команды
+    # Ставим рассылку уведомлений участникам команды в фоновую очередь
     try:
-        from notifications.services import NotificationService
-        NotificationService.send_team_status_notification(
-            team=team,
-            change_type=TeamStatusChangeType.DISBANDED,
-            changed_by=user,
-            reason=reason
+        from notifications.tasks import send_team_status_notification_task
+        send_team_status_notification_task(
+            team.id,
+            TeamStatusChangeType.DISBANDED.value,
+            user.id,
+            reason
         )
     except Exception as e:
         logger.error(f"Ошибка при отправке уведомлений о роспуске команды {team.name}: {e}")
@@ -188,6 +190,81 @@ def disband_team(team, user, reason=""):
     return True
 
 
+# Массовые переходы статуса: (условие отбора команд, новый статус,
+# новое значение is_active участников или None, если участники не меняются)
+BULK_STATUS_TRANSITIONS = {
+    TeamStatusChangeType.DEACTIVATED: (Q(status=TeamStatus.ACTIVE), TeamStatus.INACTIVE, None),
+    TeamStatusChangeType.REACTIVATED: (Q(status=TeamStatus.INACTIVE), TeamStatus.ACTIVE, True),
+    TeamStatusChangeType.DISBANDED: (~Q(status=TeamStatus.DISBANDED), TeamStatus.DISBANDED, False),
+}
+
+
+@transaction.atomic
+def bulk_change_team_status(queryset, user, change_type, reason=""):
+    """
+    Массово меняет статус команд (приостановка, возобновление или роспуск)
+    
+    Делает то же, что deactivate_team/reactivate_team/disband_team для каждой
+    команды, но фиксированным числом запросов: один UPDATE команд, один
+    UPDATE участников и один bulk_create записей истории. Команды, которые
+    нельзя перевести в новый статус или которыми пользователь не может
+    управлять, пропускаются.
+    
+    Args:
+        queryset: Команды для изменения
+        user: Пользователь, выполняющий действие
+        change_type: Тип изменения (DEACTIVATED, REACTIVATED или DISBANDED)
+        reason: Причина изменения
+    
+    Returns:
+        int: Количество команд, у которых изменен статус
+    """
+    condition, new_status, members_active = BULK_STATUS_TRANSITIONS[change_type]
+    
+    # Список id берется отдельно: queryset из админки может быть аннотирован
+    # (GROUP BY), что несовместимо с SELECT ... FOR UPDATE
+    team_ids = list(queryset.values_list('pk', flat=True))
+    teams = Team.objects.filter(pk__in=team_ids).filter(condition)
+    if not user.is_superuser:
+        teams = teams.filter(creator=user)
+    teams = list(teams.select_for_update().values_list('pk', 'status'))
+    if not teams:
+        return 0
+    
+    changed_ids = [pk for pk, _ in teams]
+    Team.objects.filter(pk__in=changed_ids).update(status=new_status, updated_at=timezone.now())
+    
+    members_count = 0
+    if members_active is not None:
+        members_count = TeamMembership.objects.filter(team_id__in=changed_ids).update(is_active=members_active)
+    
+    # Записываем в историю
+    TeamStatusHistory.objects.bulk_create([
+        TeamStatusHistory(
+            team_id=pk,
+            changed_by=user,
+            change_type=change_type,
+            old_status=old_status,
+            new_status=new_status,
+            reason=reason
+        )
+        for pk, old_status in teams
+    ], batch_size=500)
+    
+    logger.info(f"Статус {len(changed_ids)} команд изменен ({change_type}) пользователем {user.username}. "
+                f"Изменено участников: {members_count}. Причина: {reason}")
+    
+    # Ставим рассылку уведомлений участникам команд в фоновую очередь
+    try:
+        from notifications.tasks import send_team_status_notification_task
+        for team_id in changed_ids:
+            send_team_status_notification_task(team_id, change_type.value, user.id, reason)
+    except Exception as e:
+        logger.error(f"Ошибка при отправке уведомлений об изменении статуса команд: {e}")
+    
+    return len(changed_ids)
+
+
 def get_team_status_statistics(user=None):
     """
     Получает статистику по статусам команд
@@ -198,8 +275,6 @@ def get_team_status_statistics(user=None):
     Returns:
         dict: Словарь со статистикой по статусам
     """
-    from django.db.models import Q
-    
     queryset = Team.objects.all()
     
     if user:
@@ -133,7 +133,7 @@ def create_project_directory(sender, instance, created, **kwargs):
             if success:
                 FileOperationLogger.log_directory_created(
                     f"teams/{instance.team.id}/projects/{instance.content_folder}",
-                    instance.team.creator.id
+                    instance.team.creator_id
                 )
                 logger.info(f"Created directory structure for project {instance.id} ({instance.title}) in team {instance.team.id}")
             else:
@@ -212,7 +212,7 @@ def cleanup_project_files(sender, instance, **kwargs):
         if success:
             FileOperationLogger.log_file_deleted(
                 f"teams/{instance.team.id}/projects/{instance.content_folder}",
-                instance.team.creator.id
+                instance.team.creator_id
             )
             logger.info(f"Cleaned up files for project {instance.id} ({instance.title}) in team {instance.team.id}")
         else: